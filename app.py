@@ -1,12 +1,27 @@
 import streamlit as st
 import pandas as pd
 import os
-import requests
 import io
+import json
 from dotenv import load_dotenv
 from datetime import datetime
 import time
-import base64
+
+import diagnostico
+import github_http
+from cache_resultados import CacheLRU, hash_conteudo
+from rotas_github import GithubConfig, clean_github_url, obter_store, push_file_to_github
+from exportacao import MIME_XLSX, MIME_ZIP, excel_suportado, gerar_excel, gerar_zip_csv, total_linhas
+from lote import gerar_lote, zip_lote
+from cobertura import ErroCobertura, ler_cobertura, validar_cobertura
+from programacao import (
+    CALENDARIO_PADRAO, TEMPO_CICLO_PADRAO_MIN, ErroCalendario, gerar_excel_programacao, ler_recursos, programar,
+    resumo_programacao
+)
+from sequenciamento import (
+    POLITICA_PADRAO, alinhar_cobertura, centros_afetados, comparar_sequencias, dividir_por_centro, ressequenciar,
+    resumo_por_centro, sequenciar
+)
 
 # Carregando variáveis de ambiente
 load_dotenv()
@@ -17,26 +32,60 @@ st.set_page_config(
     layout="wide"
 )
 
-# Configurações do GitHub
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '').strip('"').strip()
-GITHUB_REPO = os.getenv('GITHUB_REPO', '').strip('"').strip()
-GITHUB_BRANCH = os.getenv('GITHUB_BRANCH', '').strip('"').strip()
-GITHUB_FILE = os.getenv('FILE_PATH', '').strip('"').strip() or 'Data/RotasProcesso.xlsx'
-
-# PIN para liberar a seção de credenciais (pode ser sobrescrito por env/secrets)
-GH_ACCESS_PIN = os.getenv('GH_ACCESS_PIN')
-
-# Gate de acesso à tela de Credenciais
-with st.sidebar.expander('Acesso às Credenciais'):
-    if 'gh_access_granted' not in st.session_state:
-        st.session_state.gh_access_granted = False
-    pin_input = st.text_input('PIN de acesso', value='', type='password')
-    col_a1, col_a2 = st.columns(2)
-    with col_a1:
-        if st.button('Entrar'):
-            # Libera somente se o PIN for exatamente o esperado
-            if pin_input.strip() == GH_ACCESS_PIN:
-                st.session_state.gh_access_granted = True
+# Diagnóstico: tempos das etapas desta execução e perfil opcional (cProfile)
+medidor = diagnostico.Medidor()
+expander_diagnostico = st.sidebar.expander('🩺 Diagnóstico')
+# O perfil vale para uma única execução: a caixa volta desmarcada na execução seguinte
+if st.session_state.pop('diag_perfil_desmarcar', False):
+    st.session_state.diag_perfil = False
+with expander_diagnostico:
+    mostrar_diagnostico = st.checkbox('Mostrar tempos por etapa', key='diag_mostrar')
+    perfilar_execucao = st.checkbox('Perfilar esta execução (cProfile)', key='diag_perfil')
+perfil = None
+if perfilar_execucao:
+    st.session_state.diag_perfil_desmarcar = True
+    try:
+        perfil = diagnostico.Perfil()
+    except ValueError:
+        # Outro perfil já está ativo no processo (outra sessão)
+        st.sidebar.warning('Já existe um perfil em andamento; tente novamente em instantes.')
+
+# st.stop()/st.rerun() encerram a execução com uma exceção: o perfil é desligado no finally
+# para não ficar ativo no processo (no Python 3.12+ o cProfile é global)
+try:
+    # Configurações do GitHub
+    GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '').strip('"').strip()
+    GITHUB_REPO = os.getenv('GITHUB_REPO', '').strip('"').strip()
+    GITHUB_BRANCH = os.getenv('GITHUB_BRANCH', '').strip('"').strip()
+    GITHUB_FILE = os.getenv('FILE_PATH', '').strip('"').strip() or 'Data/RotasProcesso.xlsx'
+
+    # PIN para liberar a seção de credenciais (pode ser sobrescrito por env/secrets)
+    GH_ACCESS_PIN = os.getenv('GH_ACCESS_PIN')
+
+    # Gate de acesso à tela de Credenciais
+    with st.sidebar.expander('Acesso às Credenciais'):
+        if 'gh_access_granted' not in st.session_state:
+            st.session_state.gh_access_granted = False
+        pin_input = st.text_input('PIN de acesso', value='', type='password')
+        col_a1, col_a2 = st.columns(2)
+        with col_a1:
+            if st.button('Entrar'):
+                # Libera somente se o PIN for exatamente o esperado
+                if pin_input.strip() == GH_ACCESS_PIN:
+                    st.session_state.gh_access_granted = True
+                    try:
+                        st.rerun()
+                    except Exception:
+                        try:
+                            st.experimental_rerun()
+                        except Exception:
+                            pass
+                else:
+                    st.warning('PIN incorreto')
+        with col_a2:
+            if st.button('Sair'):
+                st.session_state.gh_access_granted = False
+                st.session_state.gh_overrides = {}
                 try:
                     st.rerun()
                 except Exception:
@@ -44,450 +93,518 @@ with st.sidebar.expander('Acesso às Credenciais'):
                         st.experimental_rerun()
                     except Exception:
                         pass
-            else:
-                st.warning('PIN incorreto')
-    with col_a2:
-        if st.button('Sair'):
-            st.session_state.gh_access_granted = False
-            st.session_state.gh_overrides = {}
-            try:
-                st.rerun()
-            except Exception:
-                try:
-                    st.experimental_rerun()
-                except Exception:
-                    pass
-
-# UI para sobrescrever credenciais na sessão (sem usar env ou secrets)
-if st.session_state.get('gh_access_granted', False):
-    with st.sidebar.expander('Credenciais GitHub (Sessão)'):
-        if 'gh_overrides' not in st.session_state:
-            st.session_state.gh_overrides = {}
-
-        token_input = st.text_input('Token GitHub', value=st.session_state.gh_overrides.get('token', ''), type='password')
-        repo_input = st.text_input('Repositório (URL ou owner/repo)', value=st.session_state.gh_overrides.get('repo', GITHUB_REPO))
-        branch_input = st.text_input('Branch', value=st.session_state.gh_overrides.get('branch', GITHUB_BRANCH))
-        file_input = st.text_input('Caminho do arquivo', value=st.session_state.gh_overrides.get('file', GITHUB_FILE))
-
-        if st.button('Aplicar credenciais'):
-            st.session_state.gh_overrides = {
-                'token': token_input.strip('"').strip(),
-                'repo': repo_input.strip('"').strip(),
-                'branch': branch_input.strip('"').strip(),
-                'file': file_input.strip('"').strip()
-            }
-            try:
-                st.rerun()
-            except Exception:
+
+    # UI para sobrescrever credenciais na sessão (sem usar env ou secrets)
+    if st.session_state.get('gh_access_granted', False):
+        with st.sidebar.expander('Credenciais GitHub (Sessão)'):
+            if 'gh_overrides' not in st.session_state:
+                st.session_state.gh_overrides = {}
+
+            token_input = st.text_input('Token GitHub', value=st.session_state.gh_overrides.get('token', ''), type='password')
+            repo_input = st.text_input('Repositório (URL ou owner/repo)', value=st.session_state.gh_overrides.get('repo', GITHUB_REPO))
+            branch_input = st.text_input('Branch', value=st.session_state.gh_overrides.get('branch', GITHUB_BRANCH))
+            file_input = st.text_input('Caminho do arquivo', value=st.session_state.gh_overrides.get('file', GITHUB_FILE))
+
+            if st.button('Aplicar credenciais'):
+                st.session_state.gh_overrides = {
+                    'token': token_input.strip('"').strip(),
+                    'repo': repo_input.strip('"').strip(),
+                    'branch': branch_input.strip('"').strip(),
+                    'file': file_input.strip('"').strip()
+                }
                 try:
-                    st.experimental_rerun()
+                    st.rerun()
                 except Exception:
-                    pass
-
-# Aplica overrides da sessão, se houver
-_ov = st.session_state.get('gh_overrides', {})
-GITHUB_TOKEN = _ov.get('token', GITHUB_TOKEN)
-GITHUB_REPO = _ov.get('repo', GITHUB_REPO)
-GITHUB_BRANCH = _ov.get('branch', GITHUB_BRANCH)
-GITHUB_FILE = _ov.get('file', GITHUB_FILE)
-
-# Função para extrair usuário/repositório do GitHub
-def clean_github_url(url):
-    if not url:
-        return None
-    url = url.strip('"').strip()
-    if url.endswith('.git'):
-        url = url[:-4]
-    if 'github.com/' in url:
-        parts = url.split('github.com/')
-        if len(parts) > 1:
-            return parts[1]
-    return url
-
-# Função para carregar arquivo do GitHub
-@st.cache_data(ttl=300)
-def load_github_file():
-    """Carrega o arquivo Excel do repositório GitHub configurado em GITHUB_REPO/GITHUB_FILE."""
-    try:
-
-        repo = clean_github_url(GITHUB_REPO)
-        if not repo:
-            st.sidebar.error("Repositório GitHub inválido ou não configurado.")
-            return None
-
-        headers = {
-            "Authorization": f"token {GITHUB_TOKEN}" if GITHUB_TOKEN else None,
-            "Accept": "application/vnd.github.v3+json"
-        }
-        # Remove None headers
-        headers = {k: v for k, v in headers.items() if v}
-
-        # Primeiro tenta a URL raw (funciona bem para repositórios públicos e branches)
-        branch_for_raw = GITHUB_BRANCH or 'main'
-        raw_url = f"https://raw.githubusercontent.com/{repo}/{branch_for_raw}/{GITHUB_FILE}"
-
-    # informações de conexão suprimidas por solicitação
+                    try:
+                        st.experimental_rerun()
+                    except Exception:
+                        pass
 
-        # Tenta raw.githubusercontent.com primeiro
-        try:
-            raw_resp = requests.get(raw_url, headers=headers, timeout=20)
-            if raw_resp.status_code == 200:
+    # Aplica overrides da sessão, se houver
+    _ov = st.session_state.get('gh_overrides', {})
+    # Rotas de credenciais da sessão ficam num registro limitado (ver rotas_github.obter_store)
+    credenciais_sessao = bool(_ov)
+    GITHUB_TOKEN = _ov.get('token', GITHUB_TOKEN)
+    GITHUB_REPO = _ov.get('repo', GITHUB_REPO)
+    GITHUB_BRANCH = _ov.get('branch', GITHUB_BRANCH)
+    GITHUB_FILE = _ov.get('file', GITHUB_FILE)
+
+    # --- UI: botão na sidebar para importar RotasProcesso.xlsx para o GitHub ---
+    with st.sidebar.expander('Atualizar Rotas Processo'):
+        st.write('Enviar/atualizar o arquivo RotasProcesso.xlsx.')
+
+        # Preferir arquivo local no workspace
+        local_path = os.path.join(os.getcwd(), 'Data', 'RotasProcesso.xlsx')
+        file_to_send = None
+        file_label = ''
+
+        if os.path.exists(local_path):
+            st.write(f'Arquivo local encontrado: {local_path}')
+            use_local = st.checkbox('Usar arquivo local Data/RotasProcesso.xlsx', value=True)
+            if use_local:
                 try:
-                    df = pd.read_excel(io.BytesIO(raw_resp.content))
-                    return df
+                    with open(local_path, 'rb') as f:
+                        file_to_send = f.read()
+                        file_label = local_path
                 except Exception as e:
-                    st.sidebar.error(f"Falha ao ler Excel a partir do conteúdo raw: {e}")
-        except requests.exceptions.RequestException:
-            # Falha no raw; seguirá para o endpoint contents
-            pass
-
-        # Fallback: usar endpoint /contents para obter base64 (necessita autenticação para repositórios privados)
-        api_url = f"https://api.github.com/repos/{repo}/contents/{GITHUB_FILE}"
-        if GITHUB_BRANCH:
-            api_url += f"?ref={GITHUB_BRANCH}"
-
-        response = requests.get(api_url, headers=headers, timeout=20)
-        # Mostra status para diagnóstico
-        if response.status_code != 200:
-            try:
-                body = response.json()
-            except Exception:
-                body = response.text
-            st.sidebar.error(f"Requisição API /contents retornou {response.status_code}: {body}")
-            return None
-
-        file_content = response.json()
-        if isinstance(file_content, dict) and 'content' in file_content:
-            raw_b64 = file_content['content']
-        else:
-            st.sidebar.error("Resposta da API não contém campo 'content'.")
-            return None
-
-        # Decodifica e lê o Excel
-        try:
-            file_data = base64.b64decode(raw_b64)
-            df = pd.read_excel(io.BytesIO(file_data))
-        except Exception as e:
-            st.sidebar.error(f"Erro ao decodificar/ler o arquivo retornado pela API: {e}")
-            return None
-
-        with st.sidebar.expander("✅ Status"):
-            st.success("Conexão estabelecida com sucesso!")
-            st.write(f"📊 Registros carregados: {len(df)}")
-            st.write(f"🕒 Atualizado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-
-        return df
-    except requests.exceptions.RequestException as e:
-        with st.sidebar.expander("❌ Erro de Conexão"):
-            st.error(f"Erro na requisição HTTP: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                st.write("Status:", e.response.status_code)
-                st.write("Detalhes:", e.response.text)
-        return None
-    except Exception as e:
-        with st.sidebar.expander("❌ Erro"):
-            st.error(f"Erro inesperado ao carregar arquivo do GitHub: {e}")
-        return None
-
-
-# --- Funções para enviar/atualizar arquivo no GitHub ---
-def push_file_to_github(file_bytes: bytes, target_path: str, repo: str, branch: str | None = None, token: str | None = None):
-    """Envia ou atualiza um arquivo no repositório GitHub usando o endpoint /contents.
-    Retorna (success: bool, message: str).
-    """
-    if not repo:
-        return False, "Repositório não configurado"
-    if token is None or token == "":
-        return False, "GITHUB_TOKEN ausente - necessário para escrever em repositórios privados ou autenticar gravação."
-
-    api_url = f"https://api.github.com/repos/{repo}/contents/{target_path}"
-    if branch:
-        api_url += f"?ref={branch}"
-
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-
-    # Verifica se o arquivo já existe para obter o sha
-    try:
-        get_resp = requests.get(api_url, headers=headers, timeout=20)
-    except Exception as e:
-        return False, f"Erro na requisição GET ao GitHub: {e}"
-
-    sha = None
-    if get_resp.status_code == 200:
-        try:
-            body = get_resp.json()
-            sha = body.get('sha')
-        except Exception:
-            sha = None
-    elif get_resp.status_code not in (404,):
-        # se não for 404 (não encontrado), retorna erro com corpo para diagnóstico
-        try:
-            return False, f"Erro GET ({get_resp.status_code}): {get_resp.json()}"
-        except Exception:
-            return False, f"Erro GET ({get_resp.status_code}): {get_resp.text}"
-
-    content_b64 = base64.b64encode(file_bytes).decode('utf-8')
-    payload = {
-        "message": f"Atualiza {target_path} via Streamlit",
-        "content": content_b64,
-    }
-    if branch:
-        payload['branch'] = branch
-    if sha:
-        payload['sha'] = sha
+                    st.error(f'Erro ao ler arquivo local: {e}')
+        if file_to_send is None:
+            uploaded_for_push = st.file_uploader('Selecione um arquivo .xlsx', type=['xlsx'], label_visibility='collapsed')
+            if uploaded_for_push is not None:
+                file_to_send = uploaded_for_push.read()
+                file_label = getattr(uploaded_for_push, 'name', 'uploaded')
+
+        if st.button('Atualizar'):
+            if not file_to_send:
+                st.sidebar.error('Nenhum arquivo disponível para envio. Coloque o arquivo em Data/RotasProcesso.xlsx ou faça upload.')
+            else:
+                st.sidebar.info('Enviando arquivo...')
+                success, msg = push_file_to_github(file_to_send, GITHUB_FILE, clean_github_url(GITHUB_REPO), GITHUB_BRANCH or 'main', GITHUB_TOKEN)
+                if success:
+                    st.sidebar.success(msg)
+                    # Antecipa a verificação de nova versão das rotas em segundo plano
+                    obter_store(
+                        GithubConfig(clean_github_url(GITHUB_REPO), GITHUB_BRANCH, GITHUB_FILE, GITHUB_TOKEN),
+                        credenciais_sessao
+                    ).solicitar_atualizacao()
+
+                    # Observação: o envio já cria o commit remoto.
+                    # Força apenas o rerun local sem alterar a URL (mantém link estável)
+                    try:
+                        st.rerun()
+                    except Exception:
+                        try:
+                            st.experimental_rerun()
+                        except Exception:
+                            pass
+                else:
+                    st.sidebar.error(msg)
 
-    try:
-        put_resp = requests.put(f"https://api.github.com/repos/{repo}/contents/{target_path}", headers=headers, json=payload, timeout=30)
-    except Exception as e:
-        return False, f"Erro na requisição PUT ao GitHub: {e}"
-
-    if put_resp.status_code in (200, 201):
-        try:
-            data = put_resp.json()
-            return True, f"Arquivo enviado com sucesso. Commit: {data.get('commit', {}).get('sha', '')}"
-        except Exception:
-            return True, "Arquivo enviado com sucesso (sem detalhes de commit)"
-    else:
-        try:
-            return False, f"Falha ao enviar (HTTP {put_resp.status_code}): {put_resp.json()}"
-        except Exception:
-            return False, f"Falha ao enviar (HTTP {put_resp.status_code}): {put_resp.text}"
+    # Título da aplicação
+    st.title("Sequenciamento de Produção")
 
+    # Verificando configurações do GitHub
+    if not all([GITHUB_TOKEN, GITHUB_REPO, GITHUB_FILE]):
+        st.error("⚠️ Configurações do GitHub ausentes ou incompletas")
+        st.stop()
 
-# --- UI: botão na sidebar para importar RotasProcesso.xlsx para o GitHub ---
-with st.sidebar.expander('Atualizar Rotas Processo'):
-    st.write('Enviar/atualizar o arquivo RotasProcesso.xlsx.')
+    # Rotas compartilhadas pelo processo: atualizadas em segundo plano, sem bloquear a sessão
+    rotas_store = obter_store(
+        GithubConfig(clean_github_url(GITHUB_REPO), GITHUB_BRANCH, GITHUB_FILE, GITHUB_TOKEN), credenciais_sessao
+    )
+    with st.spinner("Carregando rotas do GitHub..."):
+        with medidor.etapa('rotas.obter'):
+            versao_rotas = rotas_store.obter()
+    rotas_df = versao_rotas.df
+    indice_rotas = versao_rotas.indice
 
-    # Preferir arquivo local no workspace
-    local_path = os.path.join(os.getcwd(), 'Data', 'RotasProcesso.xlsx')
-    file_to_send = None
-    file_label = ''
+    if versao_rotas.erro:
+        with st.sidebar.expander("⚠️ Aviso de Atualização"):
+            st.warning(f"Não foi possível atualizar as rotas: {versao_rotas.erro}")
+
+    if rotas_df is None:
+        st.error("❌ Não foi possível carregar os dados do GitHub")
+        st.stop()
+
+    with st.sidebar.expander("✅ Status"):
+        st.write(f"📊 Registros carregados: {len(rotas_df)}")
+        st.write(f"🔖 Versão (commit): {versao_rotas.sha[:7] if versao_rotas.sha else 'desconhecida'}")
+        st.write(f"🕒 Carregado em: {versao_rotas.carregado_em.strftime('%d/%m/%Y %H:%M:%S')}")
+        idade = (datetime.now() - versao_rotas.carregado_em).total_seconds()
+        st.write(f"⏱️ Idade dos dados: {int(idade // 60)} min {int(idade % 60)} s")
+        if versao_rotas.verificado_em:
+            st.write(f"🔄 Última verificação: {versao_rotas.verificado_em.strftime('%d/%m/%Y %H:%M:%S')}")
+        if versao_rotas.memoria:
+            antes, depois = versao_rotas.memoria
+            st.write(f"💾 Memória das rotas: {antes / 1024 ** 2:.1f} MB → {depois / 1024 ** 2:.1f} MB")
+
+    MB = 1024 ** 2
+
+
+    @st.cache_resource
+    def get_caches_resultados():
+        """Caches de resultados compartilhados entre as sessões, um por tipo.
+
+        Separados para que um tipo não expulse o outro (ex.: ajustes na programação
+        não descartam sequências) e limitados também pelo tamanho aproximado em bytes.
+        """
+        return {
+            'cobertura': CacheLRU(max_entradas=32, max_bytes=256 * MB),  # leitura, validação e alinhamento
+            'sequencia': CacheLRU(max_entradas=32, max_bytes=256 * MB),  # sequências e alterações
+            'lote': CacheLRU(max_entradas=4, max_bytes=256 * MB),  # ZIPs com um Excel por operação
+            'programacao': CacheLRU(max_entradas=16, max_bytes=128 * MB),  # calendários e programações
+        }
 
-    if os.path.exists(local_path):
-        st.write(f'Arquivo local encontrado: {local_path}')
-        use_local = st.checkbox('Usar arquivo local Data/RotasProcesso.xlsx', value=True)
-        if use_local:
-            try:
-                with open(local_path, 'rb') as f:
-                    file_to_send = f.read()
-                    file_label = local_path
-            except Exception as e:
-                st.error(f'Erro ao ler arquivo local: {e}')
-    if file_to_send is None:
-        uploaded_for_push = st.file_uploader('Selecione um arquivo .xlsx', type=['xlsx'], label_visibility='collapsed')
-        if uploaded_for_push is not None:
-            file_to_send = uploaded_for_push.read()
-            file_label = getattr(uploaded_for_push, 'name', 'uploaded')
-
-    if st.button('Atualizar'):
-        if not file_to_send:
-            st.sidebar.error('Nenhum arquivo disponível para envio. Coloque o arquivo em Data/RotasProcesso.xlsx ou faça upload.')
+
+    def _sequenciar_e_dividir(rotas_df, cobertura_df, operacao, indice, anterior=None):
+        # Com a sequência anterior desta operação, só os centros afetados pela nova cobertura são reordenados.
+        # O resultado é o mesmo de um sequenciamento completo, então pode ser compartilhado no cache
+        # independentemente da cobertura anterior (os centros afetados não entram no valor guardado)
+        if anterior is not None:
+            resultado, _ = ressequenciar(
+                anterior['resultado'], rotas_df, anterior['cobertura'], cobertura_df, operacao, indice
+            )
         else:
-            st.sidebar.info('Enviando arquivo...')
-            success, msg = push_file_to_github(file_to_send, GITHUB_FILE, clean_github_url(GITHUB_REPO), GITHUB_BRANCH or 'main', GITHUB_TOKEN)
-            if success:
-                st.sidebar.success(msg)
-                # Limpa cache para forçar recarregamento do arquivo via load_github_file
-                try:
-                    st.cache_data.clear()
-                except Exception:
-                    pass
+            resultado = sequenciar(rotas_df, cobertura_df, operacao, indice)
+        return resultado, dividir_por_centro(resultado), resumo_por_centro(resultado)
+
+
+    caches_resultados = get_caches_resultados()
+
+    # Quantidade de centros de trabalho renderizados por página de resultados
+    CENTROS_POR_PAGINA = 10
+    # Linhas enviadas ao navegador nas tabelas de detalhe (a tabela completa fica no download)
+    LINHAS_EXIBIDAS = 200
+
+    with st.sidebar.expander("📡 Requisições GitHub"):
+        stats_http = github_http.estatisticas()
+        st.write(f"Requisições: {stats_http['requisicoes']}")
+        st.write(f"Não modificado (304): {stats_http['nao_modificado']}")
+        st.write(f"Downloads completos: {stats_http['completo']}")
+        st.write(f"Erros de conexão: {stats_http['erro']}")
+
+    with st.sidebar.expander("🧠 Cache de Resultados"):
+        for nome_cache, cache in caches_resultados.items():
+            stats_cache = cache.estatisticas()
+            st.write(
+                f"**{nome_cache}** · acertos: {stats_cache['acertos']} · falhas: {stats_cache['falhas']} · "
+                f"entradas: {stats_cache['entradas']} / {stats_cache['max_entradas']} · "
+                f"{stats_cache['bytes'] / MB:.1f} / {stats_cache['max_bytes'] / MB:.0f} MB"
+            )
+
+    if rotas_df is not None:
+        # Criando o filtro de operações
+        operacoes = indice_rotas.operacoes
+        operacao_selecionada = st.selectbox(
+            "Selecione a Operação:",
+            operacoes
+        )
+
+        # Upload do arquivo complementar
+        st.subheader("Importar Planilha de Cobertura")
+        uploaded_file = st.file_uploader("Escolha o arquivo Excel", type=['xlsx'])
+        politicas_duplicados = {
+            'Manter a linha de maior consumo': 'maior_consumo',
+            'Somar o consumo (nível mais crítico)': 'somar',
+            'Rejeitar o material': 'rejeitar',
+        }
+        politica_duplicados = politicas_duplicados[st.selectbox(
+            "Materiais repetidos na cobertura",
+            list(politicas_duplicados),
+            index=list(politicas_duplicados.values()).index(POLITICA_PADRAO)
+        )]
 
-                # Observação: o endpoint /contents já cria um commit remoto.
-                # Força apenas o rerun local sem alterar a URL (mantém link estável)
+        if uploaded_file is not None:
+            try:
+                # Carregando dados do arquivo importado (reaproveitado enquanto o conteúdo não mudar)
+                bytes_cobertura = uploaded_file.getvalue()
+                hash_cobertura = hash_conteudo(bytes_cobertura)
+                # (leitura em streaming só das colunas usadas; cabeçalhos validados antes do corpo)
                 try:
-                    st.rerun()
-                except Exception:
-                    try:
-                        st.experimental_rerun()
-                    except Exception:
-                        pass
-            else:
-                st.sidebar.error(msg)
-
-# Função para verificar atualizações no GitHub
-@st.cache_data(ttl=300)  # Cache por 5 minutos
-def check_github_update():
-    token = GITHUB_TOKEN
-    repo = clean_github_url(GITHUB_REPO)
-    branch = GITHUB_BRANCH
-    file_path = GITHUB_FILE
-
-    if not all([token, repo, file_path]):
-        return None
-
-    url = f"https://api.github.com/repos/{repo}/commits"
-    params = {
-        "path": file_path,
-        "sha": branch if branch else "main",
-        "per_page": 1
-    }
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
+                    with medidor.etapa('cobertura.leitura', bytes=len(bytes_cobertura)) as etapa:
+                        cobertura_df = caches_resultados['cobertura'].obter_ou_calcular(
+                            ('cobertura', hash_cobertura),
+                            lambda: ler_cobertura(io.BytesIO(bytes_cobertura))
+                        )
+                        etapa['linhas'] = len(cobertura_df)
+                    if 'memoria' in cobertura_df.attrs:
+                        antes, depois = cobertura_df.attrs['memoria']
+                        st.caption(f"💾 Memória da cobertura: {antes / MB:.1f} MB → {depois / MB:.1f} MB "
+                                   f"({len(cobertura_df)} linhas)")
+                    missing_cols = []
+                except ErroCobertura as e:
+                    missing_cols = e.colunas_ausentes
+
+                # Verificando se as colunas necessárias existem
+                if not missing_cols:
+                    versao_chave = versao_rotas.sha or versao_rotas.carregado_em.isoformat()
+                    # Validação antes do merge: um registro por Material e relatório das linhas descartadas/suspeitas
+                    validacao = caches_resultados['cobertura'].obter_ou_calcular(
+                        ('cobertura_validada', versao_chave, hash_cobertura, politica_duplicados),
+                        lambda: validar_cobertura(cobertura_df, politica_duplicados, rotas_df)
+                    )
+                    cobertura_df = validacao.cobertura
+                    # Identifica a cobertura já tratada (conteúdo do arquivo + política) nos caches abaixo
+                    id_cobertura = f'{hash_cobertura}:{politica_duplicados}'
+                    if not validacao.relatorio.empty:
+                        with st.expander(f"⚠️ {len(validacao.relatorio)} linhas da cobertura descartadas ou com alerta"):
+                            st.dataframe(
+                                validacao.relatorio.groupby(['Motivo', 'Tratamento'], sort=False).size()
+                                .rename('Linhas').reset_index(),
+                                hide_index=True
+                            )
+                            st.dataframe(validacao.relatorio.head(LINHAS_EXIBIDAS), hide_index=True)
+                            if len(validacao.relatorio) > LINHAS_EXIBIDAS:
+                                st.caption(f"Primeiras {LINHAS_EXIBIDAS} de {len(validacao.relatorio)} linhas; "
+                                           "o relatório completo está no download.")
+                            st.download_button(
+                                label="📥 Download Relatório (Excel)",
+                                data=lambda: gerar_excel({'Relatório': validacao.relatorio}),
+                                file_name='Relatorio_Cobertura.xlsx',
+                                mime=MIME_XLSX,
+                                use_container_width=True
+                            )
 
-    try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        commits = response.json()
-        if commits and isinstance(commits, list) and len(commits) > 0:
-            return commits[0]['sha']
-        return None
-    except Exception as e:
-        with st.sidebar.expander("⚠️ Aviso de Atualização"):
-            st.warning(f"Não foi possível verificar atualizações: {str(e)}")
-        return None
-
-# Título da aplicação
-st.title("Sequenciamento de Produção")
-
-# Verificando configurações do GitHub
-if not all([GITHUB_TOKEN, GITHUB_REPO, GITHUB_FILE]):
-    st.error("⚠️ Configurações do GitHub ausentes ou incompletas")
-    st.stop()
-
-# Carregando dados do GitHub
-rotas_df = load_github_file()
-
-if rotas_df is None:
-    st.error("❌ Não foi possível carregar os dados do GitHub")
-    st.stop()
-
-if rotas_df is not None:
-    # Criando o filtro de operações
-    operacoes = sorted(rotas_df['Operação'].unique())
-    operacao_selecionada = st.selectbox(
-        "Selecione a Operação:",
-        operacoes
-    )
+                    # Lote: todas as operações contra a mesma cobertura (pool de processos)
+                    with st.expander("📦 Sequenciar todas as operações"):
+                        if st.button("⚙️ Gerar lote", use_container_width=True):
+                            with st.spinner("Sequenciando todas as operações..."), medidor.etapa('lote') as etapa:
+                                resultados_lote = caches_resultados['lote'].obter_ou_calcular(
+                                    ('lote', versao_chave, id_cobertura),
+                                    lambda: gerar_lote(rotas_df, cobertura_df, indice_rotas.operacoes, politica=politica_duplicados)
+                                )
+                                etapa['linhas'] = sum(r.linhas for r in resultados_lote)
+                            st.dataframe(
+                                pd.DataFrame(
+                                    [(r.operacao, r.centros, r.linhas) for r in resultados_lote],
+                                    columns=['Operação', 'Centros', 'Itens']
+                                ),
+                                hide_index=True
+                            )
+                            st.download_button(
+                                label="⬇️ Download ZIP (um Excel por operação)",
+                                data=zip_lote(resultados_lote),
+                                file_name='Sequenciamento_Lote.zip',
+                                mime=MIME_ZIP,
+                                use_container_width=True
+                            )
 
-    # Upload do arquivo complementar
-    st.subheader("Importar Planilha de Cobertura")
-    uploaded_file = st.file_uploader("Escolha o arquivo Excel", type=['xlsx'])
-
-    if uploaded_file is not None:
-        try:
-            # Carregando dados do arquivo importado
-            cobertura_df = pd.read_excel(uploaded_file)
-
-            # Verificando se as colunas necessárias existem
-            required_columns = ['Material', 'Nível de Cobertura', 'Consumo(Pico)']
-            if all(col in cobertura_df.columns for col in required_columns):
-                # Filtrando dados pela operação selecionada
-                rotas_filtradas = rotas_df[rotas_df['Operação'] == operacao_selecionada]
-
-                # Realizando o merge dos dataframes
-                resultado = pd.merge(
-                    rotas_filtradas,
-                    cobertura_df,
-                    left_on='Semiacabado',
-                    right_on='Material',
-                    how='inner'
-                )
+                    # Merge, filtro de EXCEDENTE, ordenação e sequência em uma única passada
+                    # (Material já com os códigos do Semiacabado das rotas)
+                    cobertura_alinhada = caches_resultados['cobertura'].obter_ou_calcular(
+                        ('cobertura_alinhada', versao_chave, id_cobertura),
+                        lambda: alinhar_cobertura(cobertura_df, rotas_df)
+                    )
+
+                    # Última cobertura sequenciada nesta sessão para as mesmas rotas e operação
+                    chave_sequencia = (versao_chave, operacao_selecionada)
+                    sequencia_atual = st.session_state.get('sequencia_atual')
+                    if (sequencia_atual is not None and sequencia_atual['chave'] == chave_sequencia
+                            and sequencia_atual['hash'] != id_cobertura):
+                        st.session_state.sequencia_anterior = sequencia_atual
+                    sequencia_anterior = st.session_state.get('sequencia_anterior')
+                    if sequencia_anterior is not None and (sequencia_anterior['chave'] != chave_sequencia
+                                                           or sequencia_anterior['hash'] == id_cobertura):
+                        sequencia_anterior = None
+
+                    with medidor.etapa('sequenciamento') as etapa:
+                        resultado, dados_por_centro, resumo_centros = caches_resultados['sequencia'].obter_ou_calcular(
+                            ('sequencia', versao_chave, id_cobertura, operacao_selecionada),
+                            lambda: _sequenciar_e_dividir(
+                                rotas_df, cobertura_alinhada, operacao_selecionada, indice_rotas, sequencia_anterior
+                            )
+                        )
+                        etapa['linhas'] = len(resultado)
+                    st.session_state.sequencia_atual = {
+                        'chave': chave_sequencia, 'hash': id_cobertura,
+                        'cobertura': cobertura_alinhada, 'resultado': resultado
+                    }
+
+                    if not resultado.empty:
+                        # Dicionário com as fatias de cada centro de trabalho
+                        centros_trabalho = list(dados_por_centro)
+
+                        # Área de botões no topo
+                        st.markdown("---")  # Linha divisória
+
+                        # Criando duas colunas para os botões
+                        col1, col2 = st.columns(2)
+
+                        # Os arquivos só são gerados (em memória) quando o download é clicado
+                        with col1:
+                            if excel_suportado(dados_por_centro):
+                                st.download_button(
+                                    label="📥 Download Excel",
+                                    data=lambda: gerar_excel(dados_por_centro),
+                                    file_name=f'Sequenciamento_{operacao_selecionada}.xlsx',
+                                    mime=MIME_XLSX,
+                                    use_container_width=True
+                                )
+                            else:
+                                st.info(f"Exportação com {total_linhas(dados_por_centro)} linhas: use o ZIP com CSVs.")
+                        with col2:
+                            st.download_button(
+                                label="🗜️ Download ZIP (CSV por centro)",
+                                data=lambda: gerar_zip_csv(dados_por_centro),
+                                file_name=f'Sequenciamento_{operacao_selecionada}.zip',
+                                mime=MIME_ZIP,
+                                use_container_width=True
+                            )
 
-                if not resultado.empty:
-                    # Definindo a ordem de prioridade para Nível de Cobertura
-                    nivel_ordem = {'CRÍTICO': 0, 'BAIXO': 1, 'MODERADO': 2}
-                    resultado['Nível_Ordem'] = resultado['Nível de Cobertura'].map(nivel_ordem)
-
-                    # Dicionário para armazenar os dataframes por centro de trabalho
-                    dados_por_centro = {}
-                    
-                    # Processando dados primeiro
-                    centros_trabalho = resultado['Centro de Trabalho'].unique()
-
-                    # Processar todos os dados antes de mostrar os botões
-                    for centro in centros_trabalho:
-                        # Filtrando dados do centro de trabalho e removendo EXCEDENTE
-                        dados_centro = resultado[
-                            (resultado['Centro de Trabalho'] == centro) & 
-                            (resultado['Nível de Cobertura'] != 'EXCEDENTE')
-                        ].copy()
-
-                        if not dados_centro.empty:
-                            # Ordenando por Nível de Cobertura e Consumo (Pico)
-                            dados_centro = dados_centro.sort_values(
-                                by=['Nível_Ordem', 'Consumo(Pico)'],
-                                ascending=[True, False]
+                        st.markdown("---")  # Linha divisória
+
+                        # Resumo compacto de todos os centros (uma única tabela)
+                        st.subheader("Resumo por Centro de Trabalho")
+                        st.dataframe(resumo_centros, hide_index=True)
+
+                        # Posições que mudaram em relação à cobertura anterior (mesma operação)
+                        if sequencia_anterior is not None:
+                            with st.expander("🔀 Alterações desde a cobertura anterior", expanded=True):
+                                alteracoes = caches_resultados['sequencia'].obter_ou_calcular(
+                                    ('alteracoes', versao_chave, sequencia_anterior['hash'], id_cobertura, operacao_selecionada),
+                                    lambda: comparar_sequencias(
+                                        sequencia_anterior['resultado'], resultado,
+                                        centros_afetados(rotas_df, sequencia_anterior['cobertura'], cobertura_alinhada,
+                                                         operacao_selecionada, indice_rotas)
+                                    )
+                                )
+                                if alteracoes.empty:
+                                    st.info("Nenhuma posição mudou em relação à cobertura anterior.")
+                                else:
+                                    contagem = alteracoes['Situação'].value_counts()
+                                    st.write(" · ".join(f"{situacao}: {qtd}" for situacao, qtd in contagem.items()))
+                                    st.dataframe(alteracoes.head(LINHAS_EXIBIDAS), hide_index=True)
+                                    if len(alteracoes) > LINHAS_EXIBIDAS:
+                                        st.caption(f"Primeiras {LINHAS_EXIBIDAS} de {len(alteracoes)} alterações; "
+                                                   "a lista completa está no download.")
+                                    tabela_alteracoes = {'Alterações': alteracoes}
+                                    if excel_suportado(tabela_alteracoes):
+                                        st.download_button(
+                                            label="📥 Download Alterações (Excel)",
+                                            data=lambda: gerar_excel(tabela_alteracoes),
+                                            file_name=f'Alteracoes_{operacao_selecionada}.xlsx',
+                                            mime=MIME_XLSX,
+                                            use_container_width=True
+                                        )
+                                    else:
+                                        st.download_button(
+                                            label="🗜️ Download Alterações (CSV)",
+                                            data=lambda: gerar_zip_csv(tabela_alteracoes),
+                                            file_name=f'Alteracoes_{operacao_selecionada}.zip',
+                                            mime=MIME_ZIP,
+                                            use_container_width=True
+                                        )
+
+                        # Programação com capacidade finita (calendário de turnos e máquinas por centro)
+                        with st.expander("🗓️ Programação com capacidade finita"):
+                            col_data, col_hora, col_ciclo = st.columns(3)
+                            data_programa = col_data.date_input("Data de início", value=datetime.now().date())
+                            hora_programa = col_hora.time_input("Hora de início", value=CALENDARIO_PADRAO[0].inicio)
+                            tempo_ciclo = col_ciclo.number_input(
+                                "Tempo de ciclo padrão (min)", min_value=0.1, value=TEMPO_CICLO_PADRAO_MIN, step=1.0,
+                                help="Usado quando as rotas não têm a coluna 'Tempo Ciclo (min)'"
+                            )
+                            arquivo_calendario = st.file_uploader(
+                                "Calendários por centro (opcional)", type=['xlsx'],
+                                help="Colunas: Centro de Trabalho, Dias (ex.: seg-sex), Início, Fim (HH:MM) e Capacidade. "
+                                     "Centros não listados usam dois turnos (06:00–22:00) de segunda a sexta."
                             )
+                            recursos, hash_calendario = {}, None
+                            if arquivo_calendario is not None:
+                                bytes_calendario = arquivo_calendario.getvalue()
+                                hash_calendario = hash_conteudo(bytes_calendario)
+                                try:
+                                    recursos = caches_resultados['programacao'].obter_ou_calcular(
+                                        ('calendarios', hash_calendario),
+                                        lambda: ler_recursos(io.BytesIO(bytes_calendario))
+                                    )
+                                except ErroCalendario as e:
+                                    st.error(str(e))
+                                    hash_calendario = None
 
-                            # Adicionando coluna de sequência
-                            dados_centro = dados_centro.reset_index(drop=True)
-                            dados_centro['Sequencia'] = dados_centro.index + 1
-
-                            # Armazenando dados formatados para exportação
-                            colunas_exibir = ['Sequencia', 'Semiacabado', 'Nível de Cobertura', 'Consumo(Pico)']
-                            dados_por_centro[centro] = dados_centro[colunas_exibir].copy()
-
-                    # Área de botões no topo
-                    st.markdown("---")  # Linha divisória
-                    
-                    # Criando duas colunas para os botões
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        export_button = st.button("📥 Gerar Arquivo Excel", use_container_width=True)
-                    
-                    if export_button:
-                        if dados_por_centro:
+                            inicio_programa = datetime.combine(data_programa, hora_programa)
                             try:
-                                # Criar um Excel writer usando pandas
-                                output = pd.ExcelWriter(f'Sequenciamento_{operacao_selecionada}.xlsx', engine='openpyxl')
-                                
-                                # Escrever cada centro de trabalho em uma aba separada
-                                for centro, df in dados_por_centro.items():
-                                    sheet_name = str(centro)[:31]
-                                    df.to_excel(output, sheet_name=sheet_name, index=False)
-                                
-                                output.close()
-                                
-                                # Ler o arquivo em bytes para download
-                                with open(f'Sequenciamento_{operacao_selecionada}.xlsx', 'rb') as f:
-                                    bytes_data = f.read()
-                                    
-                                # Mostrar botão de download na segunda coluna
-                                with col2:
-                                    st.download_button(
-                                        label="⬇️ Download Excel File",
-                                        data=bytes_data,
-                                        file_name=f'Sequenciamento_{operacao_selecionada}.xlsx',
-                                        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                                        use_container_width=True
+                                with medidor.etapa('programacao', linhas=len(resultado)):
+                                    programa = caches_resultados['programacao'].obter_ou_calcular(
+                                        ('programacao', versao_chave, id_cobertura, operacao_selecionada,
+                                         inicio_programa, tempo_ciclo, hash_calendario),
+                                        lambda: programar(resultado, inicio_programa, recursos, tempo_ciclo_padrao=tempo_ciclo)
                                     )
-                                st.success("✅ Arquivo Excel gerado com sucesso!")
-                            except Exception as e:
-                                st.error(f"Erro ao gerar arquivo Excel: {str(e)}")
+                            except ErroCalendario as e:
+                                st.error(str(e))
+                            else:
+                                st.dataframe(resumo_programacao(programa), hide_index=True)
+                                st.download_button(
+                                    label="📥 Download Programação (Excel)",
+                                    data=lambda: gerar_excel_programacao(programa),
+                                    file_name=f'Programacao_{operacao_selecionada}.xlsx',
+                                    mime=MIME_XLSX,
+                                    use_container_width=True
+                                )
+
+                        # Navegação: apenas o centro selecionado ou uma página de centros é renderizada
+                        busca_centro = st.text_input("🔎 Buscar Centro de Trabalho", value='')
+                        centros_filtrados = [c for c in centros_trabalho if busca_centro.strip().lower() in str(c).lower()]
+                        modo_exibicao = st.radio(
+                            "Exibição",
+                            ["Centro selecionado", "Página de centros"],
+                            horizontal=True
+                        )
+
+                        centros_exibir = []
+                        if not centros_filtrados:
+                            st.info("Nenhum centro encontrado para a busca.")
+                        elif modo_exibicao == "Centro selecionado":
+                            centros_exibir = [st.selectbox("Centro de Trabalho", centros_filtrados)]
                         else:
-                            st.warning("Não há dados para exportar. Todos os itens podem estar marcados como EXCEDENTE.")
-                    
-                    st.markdown("---")  # Linha divisória
-                    
-                    # Exibindo os dados processados
-                    for centro in centros_trabalho:
-                        if centro in dados_por_centro:
-                            st.subheader(f"Centro de Trabalho: {centro}")
-                            # Exibindo resultados
-                            st.dataframe(
-                                dados_por_centro[centro],
-                                hide_index=True
+                            total_paginas = (len(centros_filtrados) - 1) // CENTROS_POR_PAGINA + 1
+                            pagina = st.number_input(
+                                f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1, step=1
                             )
-
-                    # Mensagem de sucesso após processamento
-                    if export_button:
-                        st.success("✅ Arquivo Excel gerado com sucesso!")
+                            inicio_pagina = (int(pagina) - 1) * CENTROS_POR_PAGINA
+                            centros_exibir = centros_filtrados[inicio_pagina:inicio_pagina + CENTROS_POR_PAGINA]
+
+                        # Exibindo os dados processados
+                        with medidor.etapa('renderizacao', linhas=sum(len(dados_por_centro[c]) for c in centros_exibir)):
+                            for centro in centros_exibir:
+                                st.subheader(f"Centro de Trabalho: {centro}")
+                                # Exibindo resultados
+                                st.dataframe(
+                                    dados_por_centro[centro],
+                                    hide_index=True
+                                )
+
+                    else:
+                        st.warning("Nenhum item encontrado para a operação selecionada.")
 
                 else:
-                    st.warning("Nenhum item encontrado para a operação selecionada.")
+                    st.error(f"Colunas obrigatórias ausentes no arquivo: {', '.join(missing_cols)}")
 
-            else:
-                missing_cols = [col for col in required_columns if col not in cobertura_df.columns]
-                st.error(f"Colunas obrigatórias ausentes no arquivo: {', '.join(missing_cols)}")
-
-        except Exception as e:
-            st.error(f"Erro ao processar o arquivo: {e}")
-else:
-    st.error("Não foi possível carregar o arquivo de rotas. Verifique se o arquivo existe no diretório correto.")
\ No newline at end of file
+            except Exception as e:
+                st.error(f"Erro ao processar o arquivo: {e}")
+    else:
+        st.error("Não foi possível carregar o arquivo de rotas. Verifique se o arquivo existe no diretório correto.")
+
+    # Painel de diagnóstico (preenchido ao final para incluir todas as etapas desta execução)
+    with expander_diagnostico:
+        if mostrar_diagnostico:
+            st.write(f"Total medido nesta execução: {medidor.total_ms():.0f} ms")
+            if medidor.etapas:
+                st.dataframe(
+                    pd.DataFrame(medidor.etapas)[['etapa', 'duracao_ms', 'linhas', 'bytes']],
+                    hide_index=True
+                )
+            st.caption('Acumulado no processo (inclui a atualização das rotas em segundo plano)')
+            st.dataframe(
+                pd.DataFrame([
+                    {'etapa': nome, 'execucoes': agg['contagem'], 'media_ms': agg['soma_ms'] / agg['contagem'],
+                     'ultimo_ms': agg['ultimo']['duracao_ms']}
+                    for nome, agg in sorted(diagnostico.agregado().items())
+                ]),
+                hide_index=True
+            )
+            st.download_button(
+                label='JSON desta execução',
+                data=json.dumps(medidor.etapas, ensure_ascii=False, default=str, indent=2),
+                file_name='diagnostico.json',
+                mime='application/json'
+            )
+            st.download_button(
+                label='Métricas (Prometheus)',
+                data=diagnostico.texto_prometheus(),
+                file_name='metricas.prom',
+                mime='text/plain'
+            )
+        if perfil is not None:
+            resumo_perfil, dados_perfil = perfil.parar()
+            perfil = None
+            st.text(resumo_perfil)
+            st.download_button(
+                label='Baixar perfil (.prof)',
+                data=dados_perfil,
+                file_name=f"perfil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof",
+                mime='application/octet-stream'
+            )
+finally:
+    if perfil is not None:
+        perfil.cancelar()
@@ -0,0 +1,176 @@
+"""Benchmark das etapas do sequenciamento com dados sintéticos (sem rede).
+
+Mede, para cada tamanho de tabela de rotas: leitura dos Excel de rotas e de
+cobertura, carga das rotas pelo `rotas_github` contra um stub local do
+GitHub (download + leitura e, em seguida, snapshot), normalização/índice,
+merge/ordenação/sequência e exportação. Compara com uma baseline salva e
+sinaliza regressões (código de saída 1).
+
+    python -m bench.benchmark
+    python -m bench.benchmark --tamanhos 1000 10000 100000 1000000 --max-excel 100000
+    python -m bench.benchmark --salvar-baseline
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import cache_rotas
+import github_http
+import rotas_github
+from bench.gerador import gerar_cobertura, gerar_rotas
+from bench.stub_github import StubGitHub
+from cobertura import ler_cobertura
+from exportacao import gerar_excel
+from sequenciamento import IndiceRotas, dividir_por_centro, normalizar_rotas, sequenciar
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Diferença mínima (s) para considerar regressão, evitando ruído em etapas muito rápidas
+MINIMO_REGRESSAO_S = 0.005
+
+
+def _medir(funcao, repeticoes):
+    """Executa `funcao` `repeticoes` vezes; retorna (mediana em s, último resultado)."""
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), resultado
+
+
+def _excel_bytes(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def medir_tamanho(linhas, repeticoes=3, proporcao_cobertura=0.5, max_excel=100_000, seed=0) -> dict:
+    """Tempos (s) de cada etapa para uma tabela de rotas com `linhas` linhas."""
+    rotas = gerar_rotas(linhas, seed=seed)
+    cobertura = gerar_cobertura(rotas, max(1, int(linhas * proporcao_cobertura)), seed=seed)
+    tempos = {}
+
+    if linhas <= max_excel:
+        bytes_rotas = _excel_bytes(rotas)
+        bytes_cobertura = _excel_bytes(cobertura)
+        tempos['excel.rotas'], _ = _medir(lambda: pd.read_excel(io.BytesIO(bytes_rotas)), repeticoes)
+        tempos['excel.cobertura'], cobertura = _medir(lambda: ler_cobertura(io.BytesIO(bytes_cobertura)), repeticoes)
+        tempos.update(_medir_carga_github(bytes_rotas, repeticoes))
+
+    tempos['normalizar'], (rotas_norm, indice) = _medir(
+        lambda: (lambda df: (df, IndiceRotas(df)))(normalizar_rotas(rotas)), repeticoes
+    )
+
+    maior_operacao = rotas['Operação'].value_counts().index[0]
+    tempos['sequenciar.operacao'], resultado = _medir(
+        lambda: sequenciar(rotas_norm, cobertura, maior_operacao, indice), repeticoes
+    )
+    tempos['sequenciar.todas'], _ = _medir(
+        lambda: [dividir_por_centro(sequenciar(rotas_norm, cobertura, op, indice)) for op in indice.operacoes],
+        repeticoes
+    )
+
+    dados_por_centro = dividir_por_centro(resultado)
+    if len(resultado) <= max_excel:
+        tempos['exportacao.excel'], _ = _medir(lambda: gerar_excel(dados_por_centro), repeticoes)
+
+    return {etapa: round(valor, 6) for etapa, valor in tempos.items()}
+
+
+def _medir_carga_github(bytes_rotas, repeticoes) -> dict:
+    """Carga pelo `rotas_github` com o GitHub substituído por um stub local."""
+    config = rotas_github.GithubConfig('bench/rotas', 'main', 'Data/RotasProcesso.xlsx', '')
+    api_original, raw_original = rotas_github.GITHUB_API_URL, rotas_github.GITHUB_RAW_URL
+    with StubGitHub() as stub, tempfile.TemporaryDirectory() as cache_dir:
+        stub.publicar(config.repo, config.file_path, bytes_rotas)
+        rotas_github.GITHUB_API_URL, rotas_github.GITHUB_RAW_URL = stub.api_url, stub.raw_url
+        cache_dir_original, cache_rotas.CACHE_DIR = cache_rotas.CACHE_DIR, cache_dir
+        try:
+            sha = rotas_github.buscar_sha_commit(config)
+
+            def carga_completa():
+                # Sem validadores nem snapshot: download + leitura do Excel + gravação do snapshot
+                github_http.esquecer()
+                for nome in os.listdir(cache_dir):
+                    os.remove(os.path.join(cache_dir, nome))
+                return rotas_github.carregar_rotas(config, sha)
+
+            tempo_completo, _ = _medir(carga_completa, repeticoes)
+            tempo_snapshot, _ = _medir(lambda: rotas_github.carregar_rotas(config, sha), repeticoes)
+        finally:
+            rotas_github.GITHUB_API_URL, rotas_github.GITHUB_RAW_URL = api_original, raw_original
+            cache_rotas.CACHE_DIR = cache_dir_original
+    return {'github.carga': tempo_completo, 'github.snapshot': tempo_snapshot}
+
+
+def comparar(resultados: dict, baseline: dict, tolerancia: float) -> list[str]:
+    """Lista as etapas mais lentas que a baseline além da tolerância."""
+    regressoes = []
+    for tamanho, tempos in resultados.items():
+        for etapa, atual in tempos.items():
+            base = baseline.get(tamanho, {}).get(etapa)
+            if base is None:
+                continue
+            if atual > base * (1 + tolerancia) and atual - base > MINIMO_REGRESSAO_S:
+                regressoes.append(f'{tamanho} linhas / {etapa}: {atual:.4f} s (baseline {base:.4f} s, +{(atual / base - 1) * 100:.0f}%)')
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark do sequenciamento com dados sintéticos.')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help='Quantidades de linhas da tabela de rotas')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--proporcao-cobertura', type=float, default=0.5,
+                        help='Linhas da cobertura em relação às rotas')
+    parser.add_argument('--max-excel', type=int, default=100_000,
+                        help='Acima deste tamanho as etapas de leitura/escrita de Excel são puladas')
+    parser.add_argument('--baseline', default=BASELINE_PADRAO)
+    parser.add_argument('--salvar-baseline', action='store_true', help='Grava os resultados como nova baseline')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Aumento relativo aceito antes de acusar regressão')
+    parser.add_argument('--saida', help='Grava os resultados em JSON neste arquivo')
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    for linhas in args.tamanhos:
+        tempos = medir_tamanho(linhas, args.repeticoes, args.proporcao_cobertura, args.max_excel)
+        resultados[str(linhas)] = tempos
+        for etapa, valor in tempos.items():
+            print(f'{linhas:>9} linhas  {etapa:<22} {valor * 1000:10.1f} ms')
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+    if args.salvar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f'Baseline gravada em {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('Sem baseline para comparar (use --salvar-baseline).')
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        regressoes = comparar(resultados, json.load(f), args.tolerancia)
+    if regressoes:
+        print('Regressões de desempenho:')
+        for linha in regressoes:
+            print(f'  {linha}')
+        return 1
+    print('Sem regressões em relação à baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Teste de carga do serviço HTTP (`servico.py`) contra o stub local do GitHub.
+
+Publica rotas sintéticas no stub, sobe o serviço numa porta livre com um
+RotasStore de verdade (download, snapshot e índice como em produção) e
+dispara requisições de vários clientes com conexões keep-alive. Mostra
+requisições por segundo, latências e os status recebidos.
+
+    python -m bench.carga_servico
+    python -m bench.carga_servico --linhas 100000 --clientes 16 --coberturas 4 --formato csv
+"""
+import argparse
+import http.client
+import io
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote
+
+import cache_rotas
+import rotas_github
+from bench.gerador import gerar_cobertura, gerar_rotas
+from bench.stub_github import StubGitHub
+from servico import criar_servidor
+
+CONTENT_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'json': 'application/json',
+}
+
+
+def _corpo_cobertura(cobertura, tipo) -> bytes:
+    if tipo == 'json':
+        return cobertura.to_json(orient='records', force_ascii=False).encode('utf-8')
+    if tipo == 'csv':
+        return cobertura.to_csv(index=False).encode('utf-8')
+    buffer = io.BytesIO()
+    cobertura.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def _cliente(porta, requisicoes, corpos, operacoes, formato, tipo, latencias, status, seed):
+    rng = random.Random(seed)
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+    try:
+        for _ in range(requisicoes):
+            operacao = rng.choice(operacoes)
+            caminho = f'/sequencia?operacao={quote(operacao)}&formato={formato}'
+            inicio = time.perf_counter()
+            conexao.request('POST', caminho, body=rng.choice(corpos), headers={'Content-Type': CONTENT_TYPES[tipo]})
+            resposta = conexao.getresponse()
+            resposta.read()
+            latencias.append(time.perf_counter() - inicio)
+            status[resposta.status] += 1
+    finally:
+        conexao.close()
+
+
+def executar(linhas=10_000, requisicoes=2_000, clientes=8, workers=None, coberturas=1,
+             operacoes=3, formato='json', tipo='json', seed=0) -> dict:
+    rotas = gerar_rotas(linhas, seed=seed)
+    buffer = io.BytesIO()
+    rotas.to_excel(buffer, index=False)
+    corpos = [
+        _corpo_cobertura(gerar_cobertura(rotas, max(1, linhas // 2), seed=seed + i), tipo)
+        for i in range(coberturas)
+    ]
+    lista_operacoes = rotas['Operação'].value_counts().index[:operacoes].tolist() or ['todas']
+
+    config = rotas_github.GithubConfig('bench/rotas', 'main', 'Data/RotasProcesso.xlsx', '')
+    api_original, raw_original = rotas_github.GITHUB_API_URL, rotas_github.GITHUB_RAW_URL
+    cache_dir_original = cache_rotas.CACHE_DIR
+    with StubGitHub() as stub, tempfile.TemporaryDirectory() as cache_dir:
+        stub.publicar(config.repo, config.file_path, buffer.getvalue())
+        rotas_github.GITHUB_API_URL, rotas_github.GITHUB_RAW_URL = stub.api_url, stub.raw_url
+        cache_rotas.CACHE_DIR = cache_dir
+        store = rotas_github.RotasStore(config)
+        servidor = None
+        try:
+            versao = store.obter(timeout=120)
+            if versao.df is None:
+                raise RuntimeError(f'Rotas não carregadas: {versao.erro}')
+            servidor = criar_servidor(store, porta=0, workers=workers)
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+            latencias, status = [], Counter()
+            por_cliente = [requisicoes // clientes + (i < requisicoes % clientes) for i in range(clientes)]
+            threads = [
+                threading.Thread(target=_cliente, args=(servidor.server_port, n, corpos, lista_operacoes,
+                                                        formato, tipo, latencias, status, seed + i))
+                for i, n in enumerate(por_cliente)
+            ]
+            inicio = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            duracao = time.perf_counter() - inicio
+        finally:
+            if servidor is not None:
+                servidor.shutdown()
+                servidor.server_close()
+            store.parar()
+            rotas_github.GITHUB_API_URL, rotas_github.GITHUB_RAW_URL = api_original, raw_original
+            cache_rotas.CACHE_DIR = cache_dir_original
+
+    latencias.sort()
+    return {
+        'requisicoes': len(latencias),
+        'segundos': round(duracao, 3),
+        'req_por_s': round(len(latencias) / duracao, 1),
+        'p50_ms': round(statistics.median(latencias) * 1000, 2),
+        'p95_ms': round(latencias[int(len(latencias) * 0.95) - 1] * 1000, 2),
+        'max_ms': round(latencias[-1] * 1000, 2),
+        'status': dict(status),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga do serviço de sequenciamento.')
+    parser.add_argument('--linhas', type=int, default=10_000, help='Linhas da tabela de rotas sintética')
+    parser.add_argument('--requisicoes', type=int, default=2_000)
+    parser.add_argument('--clientes', type=int, default=8, help='Conexões simultâneas')
+    parser.add_argument('--workers', type=int, default=None, help='Threads do serviço')
+    parser.add_argument('--coberturas', type=int, default=1, help='Coberturas distintas enviadas (sorteadas)')
+    parser.add_argument('--operacoes', type=int, default=3, help='Operações consultadas (as maiores)')
+    parser.add_argument('--formato', choices=['json', 'csv', 'xlsx'], default='json')
+    parser.add_argument('--tipo', choices=list(CONTENT_TYPES), default='json', help='Formato da cobertura enviada')
+    args = parser.parse_args(argv)
+
+    resultado = executar(args.linhas, args.requisicoes, args.clientes, args.workers, args.coberturas,
+                         args.operacoes, args.formato, args.tipo)
+    print(json.dumps(resultado, indent=2))
+    return 0 if set(resultado['status']) == {200} else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Gerador de rotas e coberturas sintéticas para benchmarks.
+
+As cardinalidades seguem as proporções do `Data/RotasProcesso.xlsx` real:
+poucas operações, algumas dezenas a centenas de centros de trabalho e cada
+semiacabado aparecendo em ~2,5 linhas de rota. A cobertura cobre parte dos
+semiacabados, inclui materiais desconhecidos e tem uma taxa configurável de
+linhas repetidas por Material.
+"""
+import numpy as np
+import pandas as pd
+
+NIVEIS = ['CRÍTICO', 'BAIXO', 'MODERADO', 'EXCEDENTE']
+PROB_NIVEIS = [0.15, 0.25, 0.35, 0.25]
+
+
+def gerar_rotas(linhas: int, seed: int = 0, linhas_por_semiacabado: float = 2.5) -> pd.DataFrame:
+    """Tabela de rotas com Operação, Centro de Trabalho e Semiacabado (mais colunas de apoio)."""
+    rng = np.random.default_rng(seed)
+    n_operacoes = int(np.clip(round(np.log10(max(linhas, 10)) * 4), 4, 40))
+    n_centros = int(np.clip(linhas // 90, 10, 800))
+    n_semiacabados = max(1, int(linhas / linhas_por_semiacabado))
+
+    operacoes = np.array([f'{i + 1} - Operação {i + 1}' for i in range(n_operacoes)], dtype=object)
+    centros = np.array([f'PR-{i + 100:03d}' for i in range(n_centros)], dtype=object)
+    semiacabados = np.array([f'SA{i:09d}' for i in range(n_semiacabados)], dtype=object)
+
+    # Distribuição desigual (poucos centros/operações concentram a maior parte das linhas)
+    peso_operacoes = rng.zipf(1.6, n_operacoes).astype(float)
+    peso_centros = rng.zipf(1.4, n_centros).astype(float)
+    idx_operacao = rng.choice(n_operacoes, linhas, p=peso_operacoes / peso_operacoes.sum())
+    # Cada centro pertence a uma operação, como no arquivo real
+    centro_por_operacao = [np.flatnonzero(np.arange(n_centros) % n_operacoes == i) for i in range(n_operacoes)]
+    idx_centro = np.empty(linhas, dtype=np.int64)
+    for i, candidatos in enumerate(centro_por_operacao):
+        sel = idx_operacao == i
+        if len(candidatos) == 0:
+            candidatos = np.arange(n_centros)
+        p = peso_centros[candidatos] / peso_centros[candidatos].sum()
+        idx_centro[sel] = rng.choice(candidatos, sel.sum(), p=p)
+
+    return pd.DataFrame({
+        'Semiacabado': semiacabados[rng.integers(0, n_semiacabados, linhas)],
+        'Seq Produção': rng.integers(1, 3000, linhas),
+        'Operação': operacoes[idx_operacao],
+        'Centro de Trabalho': centros[idx_centro],
+        'Localização': np.array([f'P{i:02d}-{j:02d}' for i in range(10) for j in range(10)], dtype=object)[rng.integers(0, 100, linhas)],
+    })
+
+
+def gerar_cobertura(rotas_df: pd.DataFrame, linhas: int, seed: int = 0, taxa_desconhecidos: float = 0.1,
+                    taxa_duplicados: float = 0.02) -> pd.DataFrame:
+    """Planilha de cobertura com Material, Nível de Cobertura e Consumo(Pico).
+
+    `taxa_desconhecidos` é a fração de materiais que não existem nas rotas e
+    `taxa_duplicados` a fração de linhas que repetem um Material já listado.
+    """
+    rng = np.random.default_rng(seed + 1)
+    semiacabados = pd.unique(rotas_df['Semiacabado'].dropna().to_numpy())
+
+    n_duplicados = int(linhas * taxa_duplicados)
+    n_unicos = max(1, linhas - n_duplicados)
+    n_desconhecidos = int(n_unicos * taxa_desconhecidos)
+    n_conhecidos = min(n_unicos - n_desconhecidos, len(semiacabados))
+
+    conhecidos = rng.choice(semiacabados, n_conhecidos, replace=False)
+    desconhecidos = np.array([f'SX{i:09d}' for i in range(n_unicos - n_conhecidos)], dtype=object)
+    materiais = np.concatenate([conhecidos, desconhecidos])
+    if n_duplicados:
+        materiais = np.concatenate([materiais, rng.choice(materiais, n_duplicados)])
+    rng.shuffle(materiais)
+
+    n = len(materiais)
+    return pd.DataFrame({
+        'Material': materiais,
+        'Descrição': [f'Item {i}' for i in range(n)],
+        'Nível de Cobertura': rng.choice(NIVEIS, n, p=PROB_NIVEIS),
+        'Consumo(Pico)': np.round(rng.gamma(2.0, 50.0, n), 2),
+        'Estoque': rng.integers(0, 10_000, n),
+    })
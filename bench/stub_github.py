@@ -0,0 +1,109 @@
+"""Stub local do GitHub para benchmarks e testes sem rede.
+
+Atende às rotas usadas por `rotas_github` para leitura: último commit de um
+arquivo (`/repos/{repo}/commits`), conteúdo raw (`/{repo}/{branch}/{path}`)
+e `/repos/{repo}/contents/{path}` com o media type raw. Responde 304 quando o
+ETag enviado bate com o do arquivo.
+
+    with StubGitHub() as stub:
+        stub.publicar('owner/repo', 'Data/RotasProcesso.xlsx', dados)
+        rotas_github.GITHUB_API_URL = stub.api_url
+        rotas_github.GITHUB_RAW_URL = stub.raw_url
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from rotas_github import git_blob_sha
+
+
+class StubGitHub:
+    def __init__(self, branch: str = 'main'):
+        self.branch = branch
+        self.arquivos = {}
+        self.requisicoes = 0
+        self._lock = threading.Lock()
+        self._servidor = None
+        self._thread = None
+
+    @property
+    def api_url(self) -> str:
+        return f'http://127.0.0.1:{self._servidor.server_port}/api'
+
+    @property
+    def raw_url(self) -> str:
+        return f'http://127.0.0.1:{self._servidor.server_port}/raw'
+
+    def publicar(self, repo: str, path: str, dados: bytes):
+        """Publica (ou atualiza) um arquivo; o SHA do commit passa a ser o SHA do blob."""
+        with self._lock:
+            self.arquivos[(repo, path)] = (dados, git_blob_sha(dados))
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requisicoes += 1
+                status, corpo, etag, tipo = stub._responder(self.path)
+                if etag and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Type', tipo)
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._servidor.daemon_threads = True
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def _responder(self, caminho):
+        partes = urlsplit(caminho)
+        segmentos = [unquote(p) for p in partes.path.split('/') if p]
+        nao_encontrado = (404, b'{"message": "Not Found"}', None, 'application/json')
+
+        if segmentos[:2] == ['api', 'repos'] and len(segmentos) >= 5:
+            repo = '/'.join(segmentos[2:4])
+            if segmentos[4] == 'commits':
+                path = parse_qs(partes.query).get('path', [''])[0]
+                arquivo = self.arquivos.get((repo, path))
+                if arquivo is None:
+                    return 200, b'[]', None, 'application/json'
+                corpo = json.dumps([{'sha': arquivo[1]}]).encode('utf-8')
+                return 200, corpo, f'"c-{arquivo[1]}"', 'application/json'
+            if segmentos[4] == 'contents':
+                arquivo = self.arquivos.get((repo, '/'.join(segmentos[5:])))
+                if arquivo is None:
+                    return nao_encontrado
+                return 200, arquivo[0], f'"{arquivo[1]}"', 'application/octet-stream'
+
+        if segmentos[:1] == ['raw'] and len(segmentos) >= 5:
+            repo = '/'.join(segmentos[1:3])
+            if segmentos[3] != self.branch:
+                return nao_encontrado
+            arquivo = self.arquivos.get((repo, '/'.join(segmentos[4:])))
+            if arquivo is None:
+                return nao_encontrado
+            return 200, arquivo[0], f'"{arquivo[1]}"', 'application/octet-stream'
+
+        return nao_encontrado
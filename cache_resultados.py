@@ -0,0 +1,100 @@
+"""Cache LRU em memória para resultados que se repetem entre reruns do Streamlit.
+
+As chaves devem identificar o conteúdo (ex.: SHA das rotas, hash do arquivo de
+cobertura e operação), de modo que o cache possa ser compartilhado entre
+sessões. Os valores guardados não devem ser alterados por quem os recebe.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+
+def hash_conteudo(dados: bytes) -> str:
+    """Hash do conteúdo de um arquivo enviado (usado como parte da chave)."""
+    return hashlib.blake2b(dados, digest_size=16).hexdigest()
+
+
+def tamanho_aproximado(valor) -> int:
+    """Bytes aproximados de um valor guardado (DataFrames medidos com `memory_usage(deep=True)`)."""
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    if hasattr(valor, 'memory_usage'):
+        uso = valor.memory_usage(deep=True)
+        return int(uso.sum()) if hasattr(uso, 'sum') else int(uso)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho_aproximado(k) + tamanho_aproximado(v) for k, v in valor.items())
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(tamanho_aproximado(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+class CacheLRU:
+    """Cache LRU com limite de entradas (e, opcionalmente, de bytes) e contadores de acerto/falha."""
+
+    def __init__(self, max_entradas: int = 32, max_bytes: int | None = None):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._dados = OrderedDict()
+        self._tamanhos = {}
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._calculando = {}
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter_ou_calcular(self, chave, calcular):
+        """Retorna o valor da chave, executando `calcular()` apenas em caso de falha.
+
+        Chamadas simultâneas para a mesma chave aguardam o cálculo em andamento
+        em vez de repeti-lo.
+        """
+        while True:
+            with self._lock:
+                if chave in self._dados:
+                    self._dados.move_to_end(chave)
+                    self.acertos += 1
+                    return self._dados[chave]
+                em_andamento = self._calculando.get(chave)
+                if em_andamento is None:
+                    self.falhas += 1
+                    self._calculando[chave] = threading.Event()
+                    break
+            # Se o cálculo falhar (ou a entrada já tiver saído do cache), tenta de novo
+            em_andamento.wait()
+
+        try:
+            # O cálculo roda fora do lock para não serializar as sessões
+            valor = calcular()
+            tamanho = tamanho_aproximado(valor) if self.max_bytes is not None else 0
+            # Um valor maior que o limite inteiro é devolvido sem ser guardado
+            if self.max_bytes is None or tamanho <= self.max_bytes:
+                with self._lock:
+                    self._dados[chave] = valor
+                    self._tamanhos[chave] = tamanho
+                    self.bytes += tamanho
+                    while len(self._dados) > self.max_entradas or (
+                            self.max_bytes is not None and self.bytes > self.max_bytes):
+                        antiga, _ = self._dados.popitem(last=False)
+                        self.bytes -= self._tamanhos.pop(antiga)
+        finally:
+            with self._lock:
+                self._calculando.pop(chave).set()
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+            self._tamanhos.clear()
+            self.bytes = 0
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'entradas': len(self._dados),
+                'max_entradas': self.max_entradas,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+            }
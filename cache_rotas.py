@@ -0,0 +1,108 @@
+"""Snapshot local (Parquet) do arquivo de rotas, indexado pelo SHA do commit.
+
+O Excel só é lido novamente quando o SHA do último commit do arquivo muda;
+enquanto isso, o DataFrame é recarregado do snapshot em disco.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+CACHE_DIR = os.getenv('ROTAS_CACHE_DIR', '').strip('"').strip() or os.path.join(os.getcwd(), '.cache', 'rotas')
+
+# Quantidade de snapshots mantidos em disco (os mais antigos são removidos)
+MAX_SNAPSHOTS = 3
+
+
+def chave_snapshot(repo: str, file_path: str, sha: str) -> str:
+    """Chave do snapshot: o mesmo commit pode alterar arquivos diferentes."""
+    return hashlib.sha1(f'{repo}:{file_path}:{sha}'.encode('utf-8')).hexdigest()
+
+
+def caminho_snapshot(chave: str, cache_dir: str | None = None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, f'{chave}.parquet')
+
+
+def ler_snapshot(chave: str, cache_dir: str | None = None) -> pd.DataFrame | None:
+    """Retorna o DataFrame do snapshot ou None se não existir / estiver corrompido."""
+    path = caminho_snapshot(chave, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        return None
+    # Atualiza o mtime para que a limpeza preserve o snapshot em uso
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return df
+
+
+def salvar_snapshot(chave: str, df: pd.DataFrame, cache_dir: str | None = None) -> bool:
+    """Grava o snapshot de forma atômica. Retorna False se não foi possível gravar."""
+    cache_dir = cache_dir or CACHE_DIR
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, caminho_snapshot(chave, cache_dir))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    except Exception:
+        return False
+    _limpar_snapshots(cache_dir)
+    return True
+
+
+def registrar_ultimo(repo: str, file_path: str, sha: str, cache_dir: str | None = None):
+    """Guarda qual SHA foi carregado por último, para servir o snapshot num processo novo."""
+    cache_dir = cache_dir or CACHE_DIR
+    path = _caminho_ultimo(repo, file_path, cache_dir)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'sha': sha}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def ler_ultimo(repo: str, file_path: str, cache_dir: str | None = None):
+    """Retorna (sha, df) do último snapshot registrado ou None."""
+    try:
+        with open(_caminho_ultimo(repo, file_path, cache_dir or CACHE_DIR), encoding='utf-8') as f:
+            sha = json.load(f).get('sha')
+    except (OSError, ValueError):
+        return None
+    if not sha:
+        return None
+    df = ler_snapshot(chave_snapshot(repo, file_path, sha), cache_dir)
+    if df is None:
+        return None
+    return sha, df
+
+
+def _caminho_ultimo(repo: str, file_path: str, cache_dir: str) -> str:
+    nome = hashlib.sha1(f'{repo}:{file_path}'.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f'ultimo_{nome}.json')
+
+
+def _limpar_snapshots(cache_dir: str):
+    try:
+        arquivos = [
+            os.path.join(cache_dir, nome) for nome in os.listdir(cache_dir)
+            if nome.endswith('.parquet')
+        ]
+        arquivos.sort(key=os.path.getmtime, reverse=True)
+        for path in arquivos[MAX_SNAPSHOTS:]:
+            os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,177 @@
+"""Leitura e validação da planilha de cobertura enviada pelo usuário.
+
+Percorre a primeira aba em modo somente leitura do openpyxl e guarda apenas
+as colunas usadas no sequenciamento, já com os tipos finais. Os cabeçalhos
+são validados antes de ler o corpo da planilha. O serviço HTTP também aceita
+a cobertura em CSV ou JSON, com as mesmas colunas. A validação (antes do merge)
+deixa um registro por Material e lista as linhas descartadas ou suspeitas,
+identificadas pelo número da linha na planilha.
+"""
+import io
+import json
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from sequenciamento import COLUNAS_OBRIGATORIAS, NIVEIS_VALIDOS, POLITICA_PADRAO, consolidar_cobertura, memoria_bytes
+
+COLUNAS_RELATORIO = ['Linha', *COLUNAS_OBRIGATORIAS, 'Motivo', 'Tratamento']
+
+_TRATAMENTO_DUPLICADO = {
+    'maior_consumo': 'Descartada (mantida a linha de maior consumo)',
+    'somar': 'Consumo somado na primeira linha do Material',
+    'rejeitar': 'Rejeitada (todas as linhas do Material)',
+}
+
+
+class ErroCobertura(ValueError):
+    """Planilha de cobertura inválida (ex.: colunas obrigatórias ausentes)."""
+
+    def __init__(self, mensagem, colunas_ausentes=()):
+        super().__init__(mensagem)
+        self.colunas_ausentes = list(colunas_ausentes)
+
+
+def ler_cobertura(arquivo, colunas=COLUNAS_OBRIGATORIAS) -> pd.DataFrame:
+    """Lê as `colunas` da primeira aba de `arquivo` (caminho ou objeto binário).
+
+    'Nível de Cobertura' é convertido para category e 'Consumo(Pico)' para
+    float; `df.attrs['memoria']` guarda a memória (bytes) antes e depois da
+    conversão. O índice ('Linha') é o número da linha na planilha. Lança
+    ErroCobertura se algum cabeçalho obrigatório não existir.
+    """
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        cabecalho = next(ws.iter_rows(max_row=1, values_only=True), None) or ()
+        posicoes = {}
+        for i, nome in enumerate(cabecalho):
+            if nome in colunas and nome not in posicoes:
+                posicoes[nome] = i
+
+        _verificar_colunas(posicoes, colunas)
+
+        indices = [posicoes[col] for col in colunas]
+        valores = [[] for _ in colunas]
+        numeros = []
+        # Colunas à direita da última coluna usada não são materializadas
+        linhas = ws.iter_rows(min_row=2, max_col=max(indices) + 1, values_only=True)
+        for numero, linha in enumerate(linhas, start=2):
+            selecionados = [linha[i] if i < len(linha) else None for i in indices]
+            # Linhas totalmente vazias (formatação residual) são ignoradas
+            if all(v is None for v in selecionados):
+                continue
+            numeros.append(numero)
+            for lista, valor in zip(valores, selecionados):
+                lista.append(valor)
+    finally:
+        wb.close()
+
+    df = pd.DataFrame(dict(zip(colunas, valores)), columns=list(colunas), index=pd.Index(numeros, name='Linha'))
+    return _tipar(df)
+
+
+def ler_cobertura_csv(dados: bytes, colunas=COLUNAS_OBRIGATORIAS) -> pd.DataFrame:
+    """Lê a cobertura de um CSV (UTF-8, com ou sem BOM).
+
+    Aceita o formato exportado pelo app (separador ';' e decimal ',') e o
+    CSV comum (separador ',' e decimal '.'). O índice ('Linha') é o número da
+    linha no arquivo.
+    """
+    primeira_linha = dados.split(b'\n', 1)[0]
+    sep, decimal = (';', ',') if primeira_linha.count(b';') > primeira_linha.count(b',') else (',', '.')
+    opcoes = {'sep': sep, 'decimal': decimal, 'encoding': 'utf-8-sig'}
+    try:
+        cabecalho = pd.read_csv(io.BytesIO(dados), nrows=0, **opcoes).columns
+        _verificar_colunas(cabecalho, colunas)
+        df = pd.read_csv(
+            io.BytesIO(dados), usecols=list(colunas),
+            dtype={col: str for col in colunas if col != 'Consumo(Pico)'}, **opcoes
+        )
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise ErroCobertura(f'CSV da cobertura inválido: {e}') from e
+    df.index = pd.RangeIndex(2, len(df) + 2, name='Linha')
+    return _tipar(df[list(colunas)])
+
+
+def ler_cobertura_json(dados: bytes, colunas=COLUNAS_OBRIGATORIAS) -> pd.DataFrame:
+    """Lê a cobertura de um JSON: lista de objetos (ou {"cobertura": [...]}).
+
+    O índice ('Linha') é a posição do objeto na lista, a partir de 1.
+    """
+    try:
+        registros = json.loads(dados)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ErroCobertura(f'JSON da cobertura inválido: {e}') from e
+    if isinstance(registros, dict):
+        registros = registros.get('cobertura')
+    if not isinstance(registros, list) or not all(isinstance(r, dict) for r in registros):
+        raise ErroCobertura('O JSON da cobertura deve ser uma lista de objetos (ou {"cobertura": [...]})')
+
+    _verificar_colunas({chave for r in registros for chave in r} if registros else (), colunas)
+    df = pd.DataFrame.from_records(registros, columns=list(colunas))
+    df.index = pd.RangeIndex(1, len(df) + 1, name='Linha')
+    return _tipar(df)
+
+
+def _verificar_colunas(presentes, colunas):
+    ausentes = [col for col in colunas if col not in presentes]
+    if ausentes:
+        raise ErroCobertura(f"Colunas obrigatórias ausentes no arquivo: {', '.join(ausentes)}", ausentes)
+
+
+def _tipar(df: pd.DataFrame) -> pd.DataFrame:
+    memoria_antes = memoria_bytes(df)
+    if 'Nível de Cobertura' in df.columns:
+        df['Nível de Cobertura'] = df['Nível de Cobertura'].astype('category')
+    if 'Consumo(Pico)' in df.columns:
+        df['Consumo(Pico)'] = pd.to_numeric(df['Consumo(Pico)'], errors='coerce').astype('float64')
+    df.attrs['memoria'] = (memoria_antes, memoria_bytes(df))
+    return df
+
+
+class ValidacaoCobertura(NamedTuple):
+    cobertura: pd.DataFrame  # no máximo uma linha por Material, pronta para o merge
+    relatorio: pd.DataFrame  # linhas descartadas ou com alerta (COLUNAS_RELATORIO)
+
+
+def validar_cobertura(cobertura_df: pd.DataFrame, politica: str = POLITICA_PADRAO,
+                      rotas_df: pd.DataFrame | None = None) -> ValidacaoCobertura:
+    """Valida a cobertura antes do merge com as rotas.
+
+    Materiais repetidos são tratados conforme `politica` (ver
+    sequenciamento.POLITICAS_DUPLICADOS) e linhas sem Material são
+    descartadas. Nível de Cobertura desconhecido e Consumo(Pico) vazio ou não
+    numérico continuam na cobertura (vão para o fim da sequência), mas
+    aparecem no relatório; com `rotas_df`, também os materiais sem rota.
+    """
+    material = cobertura_df['Material']
+    vazio = material.isna().to_numpy()
+    if not isinstance(material.dtype, pd.CategoricalDtype):
+        vazio = vazio | material.astype(str).str.strip().eq('').to_numpy()
+
+    cobertura, duplicadas = consolidar_cobertura(cobertura_df[~vazio], politica)
+    nivel_desconhecido = ~cobertura['Nível de Cobertura'].isin(NIVEIS_VALIDOS).to_numpy()
+    consumo_vazio = np.isnan(cobertura['Consumo(Pico)'].to_numpy(dtype='float64', na_value=np.nan))
+    partes = [
+        (cobertura_df[vazio], 'Material vazio', 'Descartada'),
+        (duplicadas, 'Material duplicado', _TRATAMENTO_DUPLICADO[politica]),
+        (cobertura[nivel_desconhecido], 'Nível de Cobertura desconhecido', 'Mantida no fim da sequência'),
+        (cobertura[consumo_vazio], 'Consumo(Pico) vazio ou inválido', 'Mantida no fim do seu nível'),
+    ]
+    if rotas_df is not None:
+        sem_rota = ~cobertura['Material'].isin(rotas_df['Semiacabado']).to_numpy()
+        partes.append((cobertura[sem_rota], 'Material sem rota', 'Ignorada no sequenciamento'))
+
+    partes = [
+        df[COLUNAS_OBRIGATORIAS].astype(object).assign(Motivo=motivo, Tratamento=tratamento)
+        for df, motivo, tratamento in partes if len(df)
+    ]
+    if partes:
+        relatorio = pd.concat(partes).rename_axis('Linha').reset_index()
+    else:
+        relatorio = pd.DataFrame(columns=COLUNAS_RELATORIO)
+    relatorio = relatorio[COLUNAS_RELATORIO].sort_values('Linha', kind='stable', ignore_index=True)
+    return ValidacaoCobertura(cobertura, relatorio)
@@ -0,0 +1,120 @@
+"""Medição de tempo das etapas do app (sem dependência de Streamlit).
+
+Cada etapa medida gera um registro com duração, linhas e bytes, que é:
+- guardado no `Medidor` da execução atual (painel de diagnóstico da sidebar);
+- acumulado por etapa no processo (texto no formato Prometheus);
+- emitido como uma linha JSON no logger 'sequenciamento.diagnostico'
+  (com DIAG_LOG_JSON=1 o logger já escreve no stderr).
+
+Também há um perfilador opcional (cProfile) para uma única execução.
+"""
+import cProfile
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger('sequenciamento.diagnostico')
+if os.getenv('DIAG_LOG_JSON', '').strip() in ('1', 'true', 'True'):
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+_lock = threading.Lock()
+_agregado = {}
+
+
+class Medidor:
+    """Etapas medidas numa execução do script (um rerun do Streamlit)."""
+
+    def __init__(self):
+        self.etapas = []
+
+    def etapa(self, nome, linhas=None, bytes=None):
+        return medir(nome, self, linhas=linhas, bytes=bytes)
+
+    def total_ms(self) -> float:
+        return sum(e['duracao_ms'] for e in self.etapas)
+
+
+@contextmanager
+def medir(nome, medidor: Medidor | None = None, linhas=None, bytes=None):
+    """Mede o bloco; `linhas` e `bytes` podem ser preenchidos no dict retornado."""
+    registro = {'etapa': nome, 'linhas': linhas, 'bytes': bytes}
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro['duracao_ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+        registro['em'] = datetime.now().isoformat(timespec='seconds')
+        registrar(registro)
+        if medidor is not None:
+            medidor.etapas.append(registro)
+
+
+def registrar(registro: dict):
+    """Acumula o registro por etapa e o emite no log JSON."""
+    nome = registro['etapa']
+    with _lock:
+        agg = _agregado.setdefault(nome, {'contagem': 0, 'soma_ms': 0.0, 'linhas': 0, 'bytes': 0, 'ultimo': None})
+        agg['contagem'] += 1
+        agg['soma_ms'] += registro['duracao_ms']
+        agg['linhas'] += registro.get('linhas') or 0
+        agg['bytes'] += registro.get('bytes') or 0
+        agg['ultimo'] = dict(registro)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(registro, ensure_ascii=False, default=str))
+
+
+def agregado() -> dict:
+    """Cópia dos acumulados por etapa no processo."""
+    with _lock:
+        return {nome: dict(valores) for nome, valores in _agregado.items()}
+
+
+def texto_prometheus() -> str:
+    """Acumulados por etapa no formato de exposição de texto do Prometheus."""
+    dados = [(_rotulo(nome), agg) for nome, agg in sorted(agregado().items())]
+    linhas = [
+        '# HELP sequenciamento_etapa_segundos Duração das etapas do sequenciamento.',
+        '# TYPE sequenciamento_etapa_segundos summary',
+    ]
+    for rotulo, agg in dados:
+        linhas.append(f'sequenciamento_etapa_segundos_sum{{etapa="{rotulo}"}} {agg["soma_ms"] / 1000:.6f}')
+        linhas.append(f'sequenciamento_etapa_segundos_count{{etapa="{rotulo}"}} {agg["contagem"]}')
+    for metrica, campo in (('linhas_total', 'linhas'), ('bytes_total', 'bytes')):
+        linhas.append(f'# TYPE sequenciamento_etapa_{metrica} counter')
+        for rotulo, agg in dados:
+            linhas.append(f'sequenciamento_etapa_{metrica}{{etapa="{rotulo}"}} {agg[campo]}')
+    return '\n'.join(linhas) + '\n'
+
+
+def _rotulo(nome) -> str:
+    return str(nome).replace('\\', '\\\\').replace('"', '\\"')
+
+
+class Perfil:
+    """cProfile de uma execução: `parar()` devolve o resumo em texto e o .prof."""
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def cancelar(self):
+        """Desliga o perfil sem gerar o resumo (execução interrompida)."""
+        self._profile.disable()
+
+    def parar(self, limite: int = 30) -> tuple[str, bytes]:
+        self._profile.disable()
+        self._profile.create_stats()
+        saida = io.StringIO()
+        pstats.Stats(self._profile, stream=saida).sort_stats('cumulative').print_stats(limite)
+        # Mesmo formato de Stats.dump_stats (abre com pstats, snakeviz etc.)
+        return saida.getvalue(), marshal.dumps(self._profile.stats)
@@ -0,0 +1,96 @@
+"""Exportação das sequências por Centro de Trabalho, gerada em memória.
+
+O Excel é escrito com o openpyxl em modo write-only (linhas enviadas em
+fluxo, sem montar o modelo de células da planilha inteira) direto num buffer
+em memória. Para exportações muito grandes há a alternativa em ZIP com um
+CSV por centro.
+"""
+import io
+import re
+import zipfile
+
+import pandas as pd
+from openpyxl import Workbook
+
+from diagnostico import medir
+
+MIME_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+MIME_ZIP = 'application/zip'
+
+# Limite de linhas por aba do Excel (incluindo o cabeçalho)
+LIMITE_LINHAS_ABA = 1_048_576
+# Acima deste total de linhas o Excel deixa de ser oferecido e fica só o ZIP/CSV
+LIMITE_LINHAS_EXCEL = 500_000
+
+_CARACTERES_INVALIDOS_ABA = re.compile(r'[\[\]:*?/\\]')
+
+
+def nome_aba(centro, usados: set) -> str:
+    """Nome de aba válido e único (máx. 31 caracteres, sem caracteres proibidos)."""
+    base = _CARACTERES_INVALIDOS_ABA.sub('_', str(centro))[:31] or 'Centro'
+    nome = base
+    n = 2
+    while nome.lower() in usados:
+        sufixo = f'~{n}'
+        nome = base[:31 - len(sufixo)] + sufixo
+        n += 1
+    usados.add(nome.lower())
+    return nome
+
+
+def total_linhas(dados_por_centro: dict) -> int:
+    return sum(len(df) for df in dados_por_centro.values())
+
+
+def excel_suportado(dados_por_centro: dict) -> bool:
+    """Indica se a exportação cabe no Excel dentro do limite configurado."""
+    if total_linhas(dados_por_centro) > LIMITE_LINHAS_EXCEL:
+        return False
+    return all(len(df) < LIMITE_LINHAS_ABA for df in dados_por_centro.values())
+
+
+def gerar_excel(dados_por_centro: dict) -> bytes:
+    """Gera o Excel com uma aba por Centro de Trabalho e devolve os bytes."""
+    with medir('exportacao.excel', linhas=total_linhas(dados_por_centro)) as etapa:
+        wb = Workbook(write_only=True)
+        usados = set()
+        for centro, df in dados_por_centro.items():
+            ws = wb.create_sheet(title=nome_aba(centro, usados))
+            ws.append([str(col) for col in df.columns])
+            for linha in df.itertuples(index=False, name=None):
+                ws.append([_valor_celula(v) for v in linha])
+
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        etapa['bytes'] = buffer.tell()
+    return buffer.getvalue()
+
+
+def gerar_zip_csv(dados_por_centro: dict) -> bytes:
+    """Gera um ZIP com um CSV (separador ';', decimal ',', UTF-8 com BOM) por Centro de Trabalho."""
+    with medir('exportacao.zip', linhas=total_linhas(dados_por_centro)) as etapa:
+        buffer = io.BytesIO()
+        usados = set()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            for centro, df in dados_por_centro.items():
+                with zf.open(f'{nome_aba(centro, usados)}.csv', 'w') as destino:
+                    texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+                    df.to_csv(texto, sep=';', decimal=',', index=False)
+                    texto.flush()
+                    texto.detach()
+        etapa['bytes'] = buffer.tell()
+    return buffer.getvalue()
+
+
+def _valor_celula(valor):
+    # NaN/NA/NaT viram célula vazia; tipos numpy viram tipos nativos do Python
+    if valor is None or valor is pd.NA or valor is pd.NaT:
+        return None
+    try:
+        if valor != valor:
+            return None
+    except (TypeError, ValueError):
+        pass
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return valor
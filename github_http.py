@@ -0,0 +1,154 @@
+"""Cliente HTTP compartilhado para as chamadas ao GitHub.
+
+Usa uma única `requests.Session` (conexões keep-alive reaproveitadas), timeout
+padrão, retentativas com backoff para erros transitórios e requisições
+condicionais (If-None-Match / If-Modified-Since) para leituras repetidas.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (conexão, leitura) em segundos
+TIMEOUT_PADRAO = (5, 30)
+
+# Quantidade de URLs com validadores (ETag / Last-Modified) guardados em memória
+MAX_ENTRADAS_CONDICIONAIS = 16
+
+_lock = threading.Lock()
+_session = None
+_condicionais = OrderedDict()
+_contadores = {'requisicoes': 0, 'nao_modificado': 0, 'completo': 0, 'erro': 0}
+
+
+class RespostaCondicional(NamedTuple):
+    status_code: int
+    dados: object
+    resposta: requests.Response
+    do_cache: bool
+
+
+def get_session() -> requests.Session:
+    """Retorna a sessão HTTP do processo, criando-a na primeira chamada."""
+    global _session
+    with _lock:
+        if _session is None:
+            retry = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({'GET', 'HEAD'}),
+                respect_retry_after_header=True,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def get(url, headers=None, params=None, timeout=TIMEOUT_PADRAO, **kwargs) -> requests.Response:
+    return _requisicao('GET', url, headers=headers, params=params, timeout=timeout, **kwargs)
+
+
+def put(url, headers=None, json=None, timeout=TIMEOUT_PADRAO, **kwargs) -> requests.Response:
+    return _requisicao('PUT', url, headers=headers, json=json, timeout=timeout, **kwargs)
+
+
+def post(url, headers=None, json=None, timeout=TIMEOUT_PADRAO, **kwargs) -> requests.Response:
+    return _requisicao('POST', url, headers=headers, json=json, timeout=timeout, **kwargs)
+
+
+def patch(url, headers=None, json=None, timeout=TIMEOUT_PADRAO, **kwargs) -> requests.Response:
+    return _requisicao('PATCH', url, headers=headers, json=json, timeout=timeout, **kwargs)
+
+
+def _requisicao(metodo, url, **kwargs) -> requests.Response:
+    _incrementar('requisicoes')
+    try:
+        return get_session().request(metodo, url, **kwargs)
+    except requests.exceptions.RequestException:
+        _incrementar('erro')
+        raise
+
+
+def get_condicional(url, parse: Callable[[requests.Response], object], headers=None, params=None,
+                    timeout=TIMEOUT_PADRAO, stream=False, condicional=True) -> RespostaCondicional:
+    """GET condicional: em 304 reaproveita o resultado de `parse` da última resposta 200.
+
+    `parse` só é executado quando o servidor devolve conteúdo novo; se ele
+    falhar, a exceção é propagada e nada é guardado. Para status diferentes
+    de 200/304, `dados` é None e a resposta original fica em `resposta`.
+    Com `stream=True`, `parse` lê o corpo em blocos (ex.: `iter_content`).
+    Com `condicional=False` nenhum validador é enviado nem guardado: para
+    downloads grandes cuja versão já é controlada de outra forma (as rotas,
+    pelo SHA do commit), guardar o resultado só duplicaria a memória.
+    """
+    chave = _chave(url, headers, params)
+    anterior = None
+    if condicional:
+        with _lock:
+            anterior = _condicionais.get(chave)
+
+    headers = dict(headers or {})
+    if anterior is not None:
+        etag, last_modified, _ = anterior
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    resp = get(url, headers=headers, params=params, timeout=timeout, stream=stream)
+
+    if resp.status_code == 304 and anterior is not None:
+        _incrementar('nao_modificado')
+        with _lock:
+            if chave in _condicionais:
+                _condicionais.move_to_end(chave)
+        return RespostaCondicional(304, anterior[2], resp, True)
+
+    if resp.status_code != 200:
+        return RespostaCondicional(resp.status_code, None, resp, False)
+
+    _incrementar('completo')
+    try:
+        dados = parse(resp)
+    finally:
+        resp.close()
+    etag = resp.headers.get('ETag')
+    last_modified = resp.headers.get('Last-Modified')
+    if condicional and (etag or last_modified):
+        with _lock:
+            _condicionais[chave] = (etag, last_modified, dados)
+            _condicionais.move_to_end(chave)
+            while len(_condicionais) > MAX_ENTRADAS_CONDICIONAIS:
+                _condicionais.popitem(last=False)
+    return RespostaCondicional(200, dados, resp, False)
+
+
+def esquecer(url_prefixo: str = ''):
+    """Descarta os validadores das URLs que começam com `url_prefixo` (todas, por padrão)."""
+    with _lock:
+        for chave in [c for c in _condicionais if c[0].startswith(url_prefixo)]:
+            del _condicionais[chave]
+
+
+def estatisticas() -> dict:
+    """Contadores do processo: requisições, 304 (não modificado), downloads completos e erros."""
+    with _lock:
+        return dict(_contadores)
+
+
+def _incrementar(nome):
+    with _lock:
+        _contadores[nome] += 1
+
+
+def _chave(url, headers, params):
+    # O token entra na chave para não compartilhar respostas entre credenciais diferentes
+    auth = (headers or {}).get('Authorization', '')
+    return (url, tuple(sorted((params or {}).items())), auth)
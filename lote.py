@@ -0,0 +1,183 @@
+"""Sequenciamento em lote de todas as operações contra a mesma planilha de cobertura.
+
+As operações são distribuídas num pool de processos; cada processo recebe as
+rotas e a cobertura uma única vez (no inicializador) e devolve, por operação,
+o Excel já gerado. Pode ser usado pelo app ou pela linha de comando:
+
+    python lote.py --cobertura Cobertura.xlsx --saida Sequenciamento.zip
+    python lote.py --cobertura Cobertura.xlsx --rotas Data/RotasProcesso.xlsx --saida saida/
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import pandas as pd
+
+from exportacao import gerar_excel, total_linhas
+from sequenciamento import (
+    COLUNAS_OBRIGATORIAS, POLITICA_PADRAO, POLITICAS_DUPLICADOS, IndiceRotas, alinhar_cobertura, consolidar_cobertura,
+    dividir_por_centro, sequenciar
+)
+
+# Colunas das rotas necessárias para o sequenciamento (reduz o volume enviado aos processos)
+COLUNAS_ROTAS = ['Operação', 'Centro de Trabalho', 'Semiacabado']
+
+_CARACTERES_INVALIDOS_ARQUIVO = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+# Estado de cada processo do pool (preenchido por _inicializar)
+_rotas = None
+_cobertura = None
+_indice = None
+
+
+class ResultadoLote(NamedTuple):
+    operacao: object
+    centros: int
+    linhas: int
+    excel: bytes | None
+
+
+def nome_arquivo(operacao) -> str:
+    return f"Sequenciamento_{_CARACTERES_INVALIDOS_ARQUIVO.sub('_', str(operacao))}.xlsx"
+
+
+def _inicializar(rotas_df, cobertura_df):
+    global _rotas, _cobertura, _indice
+    _rotas = rotas_df
+    _cobertura = cobertura_df
+    _indice = IndiceRotas(rotas_df)
+
+
+def _processar(operacao) -> ResultadoLote:
+    dados_por_centro = dividir_por_centro(sequenciar(_rotas, _cobertura, operacao, _indice))
+    if not dados_por_centro:
+        return ResultadoLote(operacao, 0, 0, None)
+    return ResultadoLote(operacao, len(dados_por_centro), total_linhas(dados_por_centro), gerar_excel(dados_por_centro))
+
+
+def gerar_lote(rotas_df: pd.DataFrame, cobertura_df: pd.DataFrame, operacoes=None,
+               max_workers: int | None = None, politica: str = POLITICA_PADRAO) -> list[ResultadoLote]:
+    """Sequencia todas as `operacoes` (padrão: todas as do arquivo de rotas).
+
+    Retorna um ResultadoLote por operação, na ordem de `operacoes`. Com
+    `max_workers=1` (ou uma única operação) tudo roda no processo atual.
+    Materiais repetidos na cobertura são consolidados conforme `politica`.
+    """
+    if operacoes is None:
+        operacoes = sorted(rotas_df['Operação'].dropna().unique())
+    operacoes = list(operacoes)
+    if not operacoes:
+        return []
+
+    rotas_df = rotas_df[[col for col in COLUNAS_ROTAS if col in rotas_df.columns]]
+    # Material convertido uma vez para as categorias de Semiacabado (merge por códigos nos processos)
+    cobertura_df = alinhar_cobertura(cobertura_df[COLUNAS_OBRIGATORIAS], rotas_df)
+    # Consolidada uma única vez aqui, e não em cada processo
+    cobertura_df, _ = consolidar_cobertura(cobertura_df, politica)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_workers = min(max_workers, len(operacoes))
+
+    if max_workers == 1:
+        global _rotas, _cobertura, _indice
+        _inicializar(rotas_df, cobertura_df)
+        try:
+            return [_processar(op) for op in operacoes]
+        finally:
+            _rotas = _cobertura = _indice = None
+
+    # 'spawn' e não 'fork': o app chama o lote de um processo com várias threads, e um filho
+    # criado por fork herdaria travas (ex.: diagnostico._lock) presas por outras threads
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_inicializar, initargs=(rotas_df, cobertura_df)) as pool:
+        return list(pool.map(_processar, operacoes))
+
+
+def zip_lote(resultados: list[ResultadoLote]) -> bytes:
+    """ZIP com um Excel por operação (operações sem itens são omitidas)."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for r in resultados:
+            if r.excel is not None:
+                zf.writestr(nome_arquivo(r.operacao), r.excel)
+    return buffer.getvalue()
+
+
+def salvar_lote(resultados: list[ResultadoLote], destino: str):
+    """Grava o lote em `destino`: um .zip ou uma pasta com um Excel por operação."""
+    if destino.lower().endswith('.zip'):
+        with open(destino, 'wb') as f:
+            f.write(zip_lote(resultados))
+        return
+    os.makedirs(destino, exist_ok=True)
+    for r in resultados:
+        if r.excel is not None:
+            with open(os.path.join(destino, nome_arquivo(r.operacao)), 'wb') as f:
+                f.write(r.excel)
+
+
+def _carregar_rotas_cli(caminho_rotas):
+    if caminho_rotas:
+        return pd.read_excel(caminho_rotas)
+
+    # Sem arquivo local: usa a mesma configuração do app (variáveis de ambiente / .env)
+    from dotenv import load_dotenv
+    from rotas_github import buscar_sha_commit, carregar_rotas, config_do_ambiente
+
+    load_dotenv()
+    config = config_do_ambiente()
+    try:
+        sha = buscar_sha_commit(config)
+    except Exception:
+        sha = None
+    df, _ = carregar_rotas(config, sha)
+    return df
+
+
+def main(argv=None):
+    from cobertura import ErroCobertura, ler_cobertura, validar_cobertura
+
+    parser = argparse.ArgumentParser(description='Sequenciamento em lote de todas as operações.')
+    parser.add_argument('--cobertura', required=True, help='Planilha de cobertura (.xlsx)')
+    parser.add_argument('--rotas', help='Excel de rotas local (padrão: baixar do GitHub configurado no .env)')
+    parser.add_argument('--saida', default='Sequenciamento.zip', help='Arquivo .zip ou pasta de saída')
+    parser.add_argument('--operacao', action='append', help='Limita a uma ou mais operações')
+    parser.add_argument('--workers', type=int, default=None, help='Quantidade de processos (padrão: núcleos da CPU)')
+    parser.add_argument('--duplicados', choices=POLITICAS_DUPLICADOS, default=POLITICA_PADRAO,
+                        help='Tratamento de Material repetido na cobertura')
+    parser.add_argument('--relatorio', help='Grava em .xlsx as linhas da cobertura descartadas ou com alerta')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        cobertura_df = ler_cobertura(args.cobertura)
+    except ErroCobertura as e:
+        print(e, file=sys.stderr)
+        return 2
+    rotas_df = _carregar_rotas_cli(args.rotas)
+
+    validacao = validar_cobertura(cobertura_df, args.duplicados, rotas_df)
+    if len(validacao.relatorio):
+        print(f'{len(validacao.relatorio)} linhas da cobertura descartadas ou com alerta', file=sys.stderr)
+    if args.relatorio:
+        with open(args.relatorio, 'wb') as f:
+            f.write(gerar_excel({'Relatório': validacao.relatorio}))
+
+    resultados = gerar_lote(rotas_df, validacao.cobertura, args.operacao, args.workers, args.duplicados)
+    salvar_lote(resultados, args.saida)
+
+    for r in resultados:
+        print(f'{r.operacao}: {r.centros} centros, {r.linhas} itens')
+    print(f'Lote gravado em {args.saida} ({time.perf_counter() - inicio:.1f} s)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""Programação com capacidade finita a partir da sequência de cada centro.
+
+Transforma a ordem de prioridade ('Sequencia') de cada Centro de Trabalho em
+horários de início e fim, respeitando o calendário de turnos e a capacidade
+(máquinas em paralelo) de cada centro. Um único heap com a próxima máquina
+livre de todos os centros despacha os itens em ordem cronológica; o tempo é
+contado em minutos de trabalho e convertido para o relógio por busca binária
+nas janelas de turno, então o custo não depende do tamanho dos turnos.
+
+O tempo de ciclo vem da coluna COLUNA_TEMPO_CICLO das rotas, quando existir;
+nos demais casos é usado um tempo padrão por item.
+"""
+import heapq
+import unicodedata
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from exportacao import gerar_excel
+
+# Coluna opcional das rotas com o tempo de ciclo (minutos) do Semiacabado no centro
+COLUNA_TEMPO_CICLO = 'Tempo Ciclo (min)'
+TEMPO_CICLO_PADRAO_MIN = 10.0
+
+# Limite de dias percorridos no calendário (evita laço infinito com calendários sem horas)
+HORIZONTE_MAXIMO_DIAS = 3 * 365
+
+DIAS_SEMANA = {'seg': 0, 'ter': 1, 'qua': 2, 'qui': 3, 'sex': 4, 'sab': 5, 'dom': 6}
+
+COLUNAS_PROGRAMACAO = [
+    'Centro de Trabalho', 'Máquina', 'Sequencia', 'Semiacabado', 'Nível de Cobertura', 'Consumo(Pico)',
+    'Duração (min)', 'Início', 'Fim'
+]
+
+
+class ErroCalendario(ValueError):
+    """Planilha de calendários inválida ou calendário sem horas de trabalho."""
+
+
+class Turno(NamedTuple):
+    dias: frozenset  # dias da semana (0 = segunda)
+    inicio: time
+    fim: time  # fim <= inicio: o turno termina no dia seguinte
+
+
+# Dois turnos de segunda a sexta
+CALENDARIO_PADRAO = (
+    Turno(frozenset(range(5)), time(6, 0), time(14, 0)),
+    Turno(frozenset(range(5)), time(14, 0), time(22, 0)),
+)
+
+
+class RecursoCentro(NamedTuple):
+    calendario: tuple = CALENDARIO_PADRAO
+    capacidade: int = 1
+
+
+class _LinhaTempo:
+    """Janelas de trabalho de um calendário, em minutos a partir do início do plano."""
+
+    def __init__(self, calendario: tuple, inicio: datetime):
+        self.calendario = calendario
+        self.inicio = inicio
+        self._dias = 0
+        self.acum_fim = []
+        self._estender(28)
+
+    def _estender(self, dias):
+        if dias > HORIZONTE_MAXIMO_DIAS:
+            if not self.acum_fim:
+                raise ErroCalendario('Calendário sem horas de trabalho')
+            raise ErroCalendario(f'Carga excede {HORIZONTE_MAXIMO_DIAS} dias do calendário')
+        self._dias = dias
+        self.ini, self.fim = _janelas(self.calendario, self.inicio, dias)
+        duracoes = np.asarray(self.fim) - np.asarray(self.ini)
+        # Minutos de trabalho acumulados no início e no fim de cada janela
+        self.acum_fim = np.cumsum(duracoes).tolist()
+        self.acum_ini = (np.asarray(self.acum_fim) - duracoes).tolist()
+
+    def relogio(self, trabalho: float, termino: bool = False) -> float:
+        """Minuto do relógio em que se completam `trabalho` minutos de trabalho.
+
+        Para um início (`termino=False`), um instante no fim exato de uma
+        janela passa para o começo da próxima; para um término, fica nela.
+        """
+        while not self.acum_fim or trabalho > self.acum_fim[-1] or (not termino and trabalho == self.acum_fim[-1]):
+            self._estender(self._dias * 2)
+        i = bisect_left(self.acum_fim, trabalho) if termino else bisect_right(self.acum_fim, trabalho)
+        return self.ini[i] + (trabalho - self.acum_ini[i])
+
+
+def _janelas(calendario: tuple, inicio: datetime, dias: int) -> tuple[list, list]:
+    base = datetime.combine(inicio.date(), time())
+    intervalos = []
+    # Começa no dia anterior para incluir turnos que atravessam a meia-noite
+    for d in range(-1, dias):
+        dia = base + timedelta(days=d)
+        for turno in calendario:
+            if dia.weekday() not in turno.dias:
+                continue
+            a = datetime.combine(dia.date(), turno.inicio)
+            b = datetime.combine(dia.date(), turno.fim)
+            if b <= a:
+                b += timedelta(days=1)
+            a, b = max(a, inicio), b
+            if b > a:
+                intervalos.append(((a - inicio).total_seconds() / 60, (b - inicio).total_seconds() / 60))
+
+    # Turnos encostados ou sobrepostos viram uma única janela
+    ini, fim = [], []
+    for a, b in sorted(intervalos):
+        if fim and a <= fim[-1]:
+            fim[-1] = max(fim[-1], b)
+        else:
+            ini.append(a)
+            fim.append(b)
+    return ini, fim
+
+
+def tempos_de_ciclo(resultado: pd.DataFrame, padrao: float = TEMPO_CICLO_PADRAO_MIN) -> np.ndarray:
+    """Duração (min) de cada item: coluna COLUNA_TEMPO_CICLO ou `padrao` quando ausente/vazia."""
+    if COLUNA_TEMPO_CICLO in resultado.columns:
+        duracao = pd.to_numeric(resultado[COLUNA_TEMPO_CICLO], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        duracao = np.where(np.isnan(duracao), padrao, duracao)
+    else:
+        duracao = np.full(len(resultado), float(padrao))
+    return np.maximum(duracao, 0.0)
+
+
+def programar(resultado: pd.DataFrame, inicio: datetime, recursos: dict | None = None,
+              recurso_padrao: RecursoCentro = RecursoCentro(), tempo_ciclo_padrao: float = TEMPO_CICLO_PADRAO_MIN,
+              fim_horizonte: datetime | None = None) -> pd.DataFrame:
+    """Programa os itens de `sequenciar` com capacidade finita a partir de `inicio`.
+
+    `recursos` mapeia Centro de Trabalho -> RecursoCentro (calendário e
+    máquinas em paralelo); centros ausentes usam `recurso_padrao`. Dentro de
+    cada centro os itens são atendidos na ordem de 'Sequencia', cada um na
+    máquina que fica livre primeiro. Itens que começariam depois de
+    `fim_horizonte` ficam sem máquina e sem horários. Retorna uma linha por
+    item com as colunas COLUNAS_PROGRAMACAO (pronta para um gráfico de Gantt).
+    """
+    if resultado.empty:
+        return pd.DataFrame(columns=COLUNAS_PROGRAMACAO)
+
+    recursos = recursos or {}
+    codigos, centros = pd.factorize(resultado['Centro de Trabalho'])
+    # Itens de cada centro em posições contíguas, mantendo a ordem de 'Sequencia' dentro dele
+    validos = np.flatnonzero(codigos >= 0)
+    ordem = validos[np.argsort(codigos[validos], kind='stable')]
+    contagem = np.bincount(codigos[validos], minlength=len(centros))
+    fim_bloco = np.cumsum(contagem)
+    proximo = (fim_bloco - contagem).tolist()
+    fim_bloco = fim_bloco.tolist()
+    duracao = tempos_de_ciclo(resultado, tempo_ciclo_padrao)
+    duracao_lista = duracao[ordem].tolist()
+    limite = (fim_horizonte - inicio).total_seconds() / 60 if fim_horizonte is not None else None
+
+    # Uma linha do tempo por calendário distinto (em geral, poucos)
+    linhas_tempo = {}
+    linha_centro = []
+    heap = []
+    for c, centro in enumerate(centros):
+        recurso = recursos.get(centro, recurso_padrao)
+        if recurso.calendario not in linhas_tempo:
+            linhas_tempo[recurso.calendario] = _LinhaTempo(recurso.calendario, inicio)
+        linha = linhas_tempo[recurso.calendario]
+        linha_centro.append(linha)
+        livre = linha.relogio(0.0)
+        for m in range(max(1, int(recurso.capacidade))):
+            heap.append((livre, c, m, 0.0))
+    heapq.heapify(heap)
+
+    ini_ordem = np.full(len(ordem), np.nan)
+    fim_ordem = np.full(len(ordem), np.nan)
+    maquina_ordem = np.zeros(len(ordem), dtype=np.int64)
+    # Despacho: a máquina livre mais cedo (entre todos os centros) recebe o próximo item do seu centro
+    while heap:
+        livre, c, m, trabalho = heapq.heappop(heap)
+        j = proximo[c]
+        if j >= fim_bloco[c] or (limite is not None and livre >= limite):
+            continue
+        proximo[c] = j + 1
+        linha = linha_centro[c]
+        trabalho_fim = trabalho + duracao_lista[j]
+        ini_ordem[j] = livre
+        fim_ordem[j] = max(linha.relogio(trabalho_fim, termino=True), livre)
+        maquina_ordem[j] = m + 1
+        heapq.heappush(heap, (linha.relogio(trabalho_fim), c, m, trabalho_fim))
+
+    n = len(resultado)
+    ini_min = np.full(n, np.nan)
+    fim_min = np.full(n, np.nan)
+    maquina = np.zeros(n, dtype=np.int64)
+    ini_min[ordem], fim_min[ordem], maquina[ordem] = ini_ordem, fim_ordem, maquina_ordem
+
+    colunas = [c for c in COLUNAS_PROGRAMACAO[:6] if c in resultado.columns and c != 'Máquina']
+    programa = resultado[colunas].reset_index(drop=True)
+    programa.insert(1, 'Máquina', pd.arrays.IntegerArray(maquina, np.isnan(ini_min)))
+    programa['Duração (min)'] = duracao
+    base = pd.Timestamp(inicio)
+    programa['Início'] = (base + pd.to_timedelta(ini_min, unit='m')).round('s')
+    programa['Fim'] = (base + pd.to_timedelta(fim_min, unit='m')).round('s')
+    return programa
+
+
+def resumo_programacao(programa: pd.DataFrame) -> pd.DataFrame:
+    """Por centro: itens, itens programados, carga (h), início do primeiro e fim do último item."""
+    if programa.empty:
+        return pd.DataFrame(columns=['Centro de Trabalho', 'Itens', 'Programados', 'Carga (h)', 'Início', 'Fim'])
+    grupos = programa.groupby('Centro de Trabalho', sort=False, observed=True)
+    resumo = pd.DataFrame({
+        'Itens': grupos.size(),
+        'Programados': grupos['Início'].count(),
+        'Carga (h)': (grupos['Duração (min)'].sum() / 60).round(2),
+        'Início': grupos['Início'].min(),
+        'Fim': grupos['Fim'].max(),
+    })
+    resumo.index.name = 'Centro de Trabalho'
+    return resumo.reset_index()
+
+
+def gerar_excel_programacao(programa: pd.DataFrame) -> bytes:
+    """Excel com a programação completa e o resumo por centro."""
+    return gerar_excel({'Programação': programa, 'Resumo': resumo_programacao(programa)})
+
+
+def _dias(texto) -> frozenset:
+    """'seg-sex', 'seg,qua,sex', 'sáb' ou 'todos' -> dias da semana (0 = segunda)."""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode().strip().lower()
+    if texto in ('todos', 'todos os dias', '*'):
+        return frozenset(range(7))
+    dias = set()
+    for parte in texto.split(','):
+        extremos = [p.strip()[:3] for p in parte.split('-')]
+        if not all(e in DIAS_SEMANA for e in extremos) or len(extremos) > 2:
+            raise ErroCalendario(f'Dias inválidos: {texto!r} (use, por exemplo, seg-sex ou seg,qua,sex)')
+        a, b = DIAS_SEMANA[extremos[0]], DIAS_SEMANA[extremos[-1]]
+        dias.update(range(a, b + 1) if a <= b else [*range(a, 7), *range(0, b + 1)])
+    return frozenset(dias)
+
+
+def _hora(valor) -> time:
+    if isinstance(valor, datetime):
+        return valor.time()
+    if isinstance(valor, time):
+        return valor
+    if isinstance(valor, (int, float)) and 0 <= valor < 1:
+        # Fração do dia (hora gravada como número no Excel)
+        return (datetime.min + timedelta(days=float(valor))).time().replace(microsecond=0)
+    for formato in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(str(valor).strip(), formato).time()
+        except ValueError:
+            pass
+    raise ErroCalendario(f'Hora inválida: {valor!r} (use HH:MM)')
+
+
+def ler_recursos(arquivo) -> dict:
+    """Lê a planilha de calendários: uma linha por turno de cada centro.
+
+    Colunas: 'Centro de Trabalho', 'Dias' (ex.: seg-sex), 'Início' e 'Fim'
+    (HH:MM) e, opcional, 'Capacidade' (máquinas em paralelo; vale a maior
+    informada para o centro). Retorna Centro de Trabalho -> RecursoCentro.
+    """
+    df = pd.read_excel(arquivo)
+    ausentes = [c for c in ('Centro de Trabalho', 'Dias', 'Início', 'Fim') if c not in df.columns]
+    if ausentes:
+        raise ErroCalendario(f"Colunas ausentes na planilha de calendários: {', '.join(ausentes)}")
+
+    turnos, capacidades = {}, {}
+    for valores in df.dropna(subset=['Centro de Trabalho']).to_dict('records'):
+        centro = valores['Centro de Trabalho']
+        turnos.setdefault(centro, []).append(
+            Turno(_dias(valores['Dias']), _hora(valores['Início']), _hora(valores['Fim']))
+        )
+        capacidade = valores.get('Capacidade')
+        if capacidade is not None and capacidade == capacidade:
+            capacidades[centro] = max(capacidades.get(centro, 1), int(capacidade))
+    return {
+        centro: RecursoCentro(tuple(lista), capacidades.get(centro, 1))
+        for centro, lista in turnos.items()
+    }
@@ -0,0 +1,493 @@
+"""Carregamento das rotas de processo a partir do GitHub (sem dependência de Streamlit).
+
+Contém o download/leitura do Excel, a consulta do SHA do último commit do
+arquivo e o `RotasStore`, um repositório em memória compartilhado pelo
+processo que atualiza as rotas em segundo plano (stale-while-revalidate).
+"""
+import base64
+import hashlib
+import os
+import posixpath
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple
+
+import pandas as pd
+import requests
+
+import github_http
+from diagnostico import medir
+from sequenciamento import IndiceRotas, memoria_bytes, normalizar_rotas
+from cache_rotas import chave_snapshot, ler_snapshot, salvar_snapshot, registrar_ultimo, ler_ultimo
+
+# Endereços da API e do conteúdo raw (podem apontar para um stub local em testes/benchmarks)
+GITHUB_API_URL = (os.getenv('GITHUB_API_URL', '').strip() or 'https://api.github.com').rstrip('/')
+GITHUB_RAW_URL = (os.getenv('GITHUB_RAW_URL', '').strip() or 'https://raw.githubusercontent.com').rstrip('/')
+
+# Intervalo (s) entre verificações do SHA do arquivo no GitHub
+INTERVALO_ATUALIZACAO = int(os.getenv('ROTAS_INTERVALO', '60') or 60)
+
+# Download das rotas: limite de tamanho, tamanho do bloco e quanto fica em memória antes de ir ao disco
+LIMITE_DOWNLOAD_BYTES = int(os.getenv('ROTAS_LIMITE_MB', '100') or 100) * 1024 * 1024
+TAMANHO_BLOCO_BYTES = 256 * 1024
+TAMANHO_SPOOL_BYTES = 16 * 1024 * 1024
+
+# Acima deste tamanho o envio usa a Git Data API (o /contents falha perto de 1 MB)
+LIMITE_CONTENTS_BYTES = 900 * 1024
+
+
+class ErroGitHub(Exception):
+    """Falha ao consultar ou baixar o arquivo de rotas do GitHub."""
+
+
+class GithubConfig(NamedTuple):
+    repo: str
+    branch: str
+    file_path: str
+    token: str
+
+
+class VersaoRotas(NamedTuple):
+    df: pd.DataFrame | None
+    sha: str | None
+    carregado_em: datetime | None
+    verificado_em: datetime | None
+    origem: str
+    erro: str | None
+    indice: IndiceRotas | None = None
+    # (bytes antes, bytes depois) da conversão para category
+    memoria: tuple[int, int] | None = None
+
+
+# Função para extrair usuário/repositório do GitHub
+def clean_github_url(url):
+    if not url:
+        return None
+    url = url.strip('"').strip()
+    if url.endswith('.git'):
+        url = url[:-4]
+    if 'github.com/' in url:
+        parts = url.split('github.com/')
+        if len(parts) > 1:
+            return parts[1]
+    return url
+
+
+def config_do_ambiente() -> GithubConfig:
+    """Configuração a partir das variáveis de ambiente (as mesmas do app e do .env)."""
+    def _var(nome):
+        return os.getenv(nome, '').strip('"').strip()
+
+    return GithubConfig(
+        clean_github_url(_var('GITHUB_REPO')),
+        _var('GITHUB_BRANCH'),
+        _var('FILE_PATH') or 'Data/RotasProcesso.xlsx',
+        _var('GITHUB_TOKEN')
+    )
+
+
+def _headers(token):
+    headers = {
+        "Authorization": f"token {token}" if token else None,
+        "Accept": "application/vnd.github.v3+json"
+    }
+    # Remove None headers
+    return {k: v for k, v in headers.items() if v}
+
+
+def buscar_sha_commit(config: GithubConfig) -> str | None:
+    """SHA do último commit que alterou o arquivo de rotas (None se não houver)."""
+    url = f"{GITHUB_API_URL}/repos/{config.repo}/commits"
+    params = {
+        "path": config.file_path,
+        "sha": config.branch if config.branch else "main",
+        "per_page": 1
+    }
+    with medir('github.sha'):
+        response = github_http.get_condicional(url, parse=lambda resp: resp.json(), headers=_headers(config.token), params=params)
+    if response.dados is None:
+        response.resposta.raise_for_status()
+    commits = response.dados
+    if commits and isinstance(commits, list) and len(commits) > 0:
+        return commits[0]['sha']
+    return None
+
+
+def _ler_excel_em_blocos(resp: requests.Response) -> pd.DataFrame:
+    """Lê o Excel do corpo da resposta gravando-o em blocos num arquivo temporário.
+
+    O arquivo fica em memória até TAMANHO_SPOOL_BYTES e vai para o disco acima
+    disso, de modo que exista no máximo uma cópia do conteúdo durante a leitura.
+    """
+    tamanho = resp.headers.get('Content-Length')
+    if tamanho and tamanho.isdigit() and int(tamanho) > LIMITE_DOWNLOAD_BYTES:
+        raise ErroGitHub(f"Arquivo de rotas com {int(tamanho)} bytes excede o limite de {LIMITE_DOWNLOAD_BYTES} bytes.")
+
+    with tempfile.SpooledTemporaryFile(max_size=TAMANHO_SPOOL_BYTES) as tmp:
+        with medir('github.download') as etapa:
+            total = 0
+            for bloco in resp.iter_content(chunk_size=TAMANHO_BLOCO_BYTES):
+                total += len(bloco)
+                if total > LIMITE_DOWNLOAD_BYTES:
+                    raise ErroGitHub(f"Arquivo de rotas excede o limite de {LIMITE_DOWNLOAD_BYTES} bytes.")
+                tmp.write(bloco)
+            etapa['bytes'] = total
+        tmp.seek(0)
+        with medir('rotas.leitura_excel', bytes=total) as etapa:
+            df = pd.read_excel(tmp)
+            etapa['linhas'] = len(df)
+        return df
+
+
+def baixar_rotas(config: GithubConfig) -> pd.DataFrame:
+    """Baixa e lê o arquivo Excel de rotas. Lança ErroGitHub com a causa em caso de falha."""
+    if not config.repo:
+        raise ErroGitHub("Repositório GitHub inválido ou não configurado.")
+
+    headers = _headers(config.token)
+
+    # Primeiro tenta a URL raw (funciona bem para repositórios públicos e branches)
+    # (sem requisição condicional: quem evita baixar de novo o mesmo arquivo é a consulta do SHA do
+    # commit e o snapshot por SHA; o DataFrame lido não fica guardado no github_http, já que o
+    # RotasStore mantém a versão normalizada)
+    branch_for_raw = config.branch or 'main'
+    raw_url = f"{GITHUB_RAW_URL}/{config.repo}/{branch_for_raw}/{config.file_path}"
+    erro_raw = None
+    try:
+        raw_resp = github_http.get_condicional(
+            raw_url, parse=_ler_excel_em_blocos, headers=headers, stream=True, condicional=False
+        )
+        if raw_resp.dados is not None:
+            return raw_resp.dados
+        # Status diferente de 200: libera a conexão antes de tentar o /contents
+        raw_resp.resposta.close()
+    except requests.exceptions.RequestException:
+        # Falha no raw; seguirá para o endpoint contents
+        pass
+    except ErroGitHub:
+        raise
+    except Exception as e:
+        erro_raw = f"Falha ao ler Excel a partir do conteúdo raw: {e}"
+
+    # Fallback: endpoint /contents com o media type raw (conteúdo binário direto, sem JSON/base64;
+    # necessita autenticação para repositórios privados)
+    api_url = f"{GITHUB_API_URL}/repos/{config.repo}/contents/{config.file_path}"
+    params = {'ref': config.branch} if config.branch else None
+    headers_raw = {**headers, "Accept": "application/vnd.github.raw"}
+
+    try:
+        response = github_http.get_condicional(
+            api_url, parse=_ler_excel_em_blocos, headers=headers_raw, params=params, stream=True,
+            condicional=False
+        )
+    except requests.exceptions.RequestException as e:
+        raise ErroGitHub(f"Erro na requisição HTTP: {e}") from e
+    except ErroGitHub:
+        raise
+    except Exception as e:
+        raise ErroGitHub(f"Erro ao ler o arquivo retornado pela API: {e}") from e
+
+    if response.dados is None:
+        resp = response.resposta
+        try:
+            body = resp.json()
+        except Exception:
+            body = resp.text
+        finally:
+            resp.close()
+        prefixo = f"{erro_raw}. " if erro_raw else ""
+        raise ErroGitHub(f"{prefixo}Requisição API /contents retornou {response.status_code}: {body}")
+    return response.dados
+
+
+def git_blob_sha(dados: bytes) -> str:
+    """SHA do blob git do conteúdo (o mesmo que o GitHub informa para o arquivo)."""
+    return hashlib.sha1(b'blob %d\0' % len(dados) + dados).hexdigest()
+
+
+def _erro_http(prefixo, resp):
+    try:
+        return f"{prefixo} ({resp.status_code}): {resp.json()}"
+    except Exception:
+        return f"{prefixo} ({resp.status_code}): {resp.text}"
+
+
+def buscar_sha_remoto(repo: str, target_path: str, branch: str | None, headers: dict):
+    """SHA do blob remoto do arquivo (None se não existir).
+
+    Lista a pasta do arquivo em vez de buscar o próprio arquivo, para não
+    baixar o conteúdo em base64 só para obter o SHA. Lança ErroGitHub em falha.
+    """
+    pasta = posixpath.dirname(target_path)
+    api_url = f"{GITHUB_API_URL}/repos/{repo}/contents/{pasta}"
+    params = {'ref': branch} if branch else None
+    try:
+        resp = github_http.get(api_url, headers=headers, params=params)
+    except requests.exceptions.RequestException as e:
+        raise ErroGitHub(f"Erro na requisição GET ao GitHub: {e}") from e
+
+    if resp.status_code == 404:
+        return None
+    if resp.status_code != 200:
+        raise ErroGitHub(_erro_http("Erro GET", resp))
+    for item in resp.json():
+        if isinstance(item, dict) and item.get('path') == target_path:
+            return item.get('sha')
+    return None
+
+
+def _push_contents(file_bytes, target_path, repo, branch, headers, sha):
+    payload = {
+        "message": f"Atualiza {target_path} via Streamlit",
+        "content": base64.b64encode(file_bytes).decode('utf-8'),
+    }
+    if branch:
+        payload['branch'] = branch
+    if sha:
+        payload['sha'] = sha
+
+    put_resp = github_http.put(f"{GITHUB_API_URL}/repos/{repo}/contents/{target_path}", headers=headers, json=payload)
+    if put_resp.status_code not in (200, 201):
+        raise ErroGitHub(_erro_http("Falha ao enviar (HTTP)", put_resp))
+    try:
+        return put_resp.json().get('commit', {}).get('sha', '')
+    except Exception:
+        return ''
+
+
+def _push_git_data(file_bytes, target_path, repo, branch, headers):
+    """Envio de arquivos grandes: blob -> tree -> commit -> atualização da ref."""
+    api = f"{GITHUB_API_URL}/repos/{repo}/git"
+    branch = branch or 'main'
+
+    resp = github_http.post(f"{api}/blobs", headers=headers, json={
+        "content": base64.b64encode(file_bytes).decode('utf-8'),
+        "encoding": "base64",
+    })
+    if resp.status_code != 201:
+        raise ErroGitHub(_erro_http("Falha ao criar blob", resp))
+    blob_sha = resp.json()['sha']
+
+    resp = github_http.get(f"{api}/ref/heads/{branch}", headers=headers)
+    if resp.status_code != 200:
+        raise ErroGitHub(_erro_http("Falha ao obter a branch", resp))
+    parent_sha = resp.json()['object']['sha']
+
+    resp = github_http.get(f"{api}/commits/{parent_sha}", headers=headers)
+    if resp.status_code != 200:
+        raise ErroGitHub(_erro_http("Falha ao obter o commit atual", resp))
+    base_tree = resp.json()['tree']['sha']
+
+    resp = github_http.post(f"{api}/trees", headers=headers, json={
+        "base_tree": base_tree,
+        "tree": [{"path": target_path, "mode": "100644", "type": "blob", "sha": blob_sha}],
+    })
+    if resp.status_code != 201:
+        raise ErroGitHub(_erro_http("Falha ao criar tree", resp))
+    tree_sha = resp.json()['sha']
+
+    resp = github_http.post(f"{api}/commits", headers=headers, json={
+        "message": f"Atualiza {target_path} via Streamlit",
+        "tree": tree_sha,
+        "parents": [parent_sha],
+    })
+    if resp.status_code != 201:
+        raise ErroGitHub(_erro_http("Falha ao criar commit", resp))
+    commit_sha = resp.json()['sha']
+
+    # Sem force: se a branch andou nesse meio tempo, o GitHub recusa e nada é perdido
+    resp = github_http.patch(f"{api}/refs/heads/{branch}", headers=headers, json={"sha": commit_sha})
+    if resp.status_code != 200:
+        raise ErroGitHub(_erro_http("Falha ao atualizar a branch", resp))
+    return commit_sha
+
+
+# --- Funções para enviar/atualizar arquivo no GitHub ---
+def push_file_to_github(file_bytes: bytes, target_path: str, repo: str, branch: str | None = None, token: str | None = None):
+    """Envia ou atualiza um arquivo no repositório GitHub.
+
+    Não envia nada se o conteúdo for idêntico ao do repositório. Arquivos até
+    LIMITE_CONTENTS_BYTES usam o endpoint /contents; maiores, a Git Data API.
+    Retorna (success: bool, message: str).
+    """
+    if not repo:
+        return False, "Repositório não configurado"
+    if token is None or token == "":
+        return False, "GITHUB_TOKEN ausente - necessário para escrever em repositórios privados ou autenticar gravação."
+
+    headers = {
+        "Authorization": f"token {token}",
+        "Accept": "application/vnd.github.v3+json"
+    }
+
+    try:
+        sha_remoto = buscar_sha_remoto(repo, target_path, branch, headers)
+        if sha_remoto == git_blob_sha(file_bytes):
+            return True, "Arquivo idêntico ao do repositório; nenhum commit foi criado."
+
+        if len(file_bytes) <= LIMITE_CONTENTS_BYTES:
+            commit_sha = _push_contents(file_bytes, target_path, repo, branch, headers, sha_remoto)
+        else:
+            commit_sha = _push_git_data(file_bytes, target_path, repo, branch, headers)
+    except ErroGitHub as e:
+        return False, str(e)
+    except requests.exceptions.RequestException as e:
+        return False, f"Erro na requisição ao GitHub: {e}"
+
+    if commit_sha:
+        return True, f"Arquivo enviado com sucesso. Commit: {commit_sha}"
+    return True, "Arquivo enviado com sucesso (sem detalhes de commit)"
+
+
+def carregar_rotas(config: GithubConfig, sha: str | None) -> tuple[pd.DataFrame, str]:
+    """Carrega as rotas do snapshot local do commit `sha` ou, se não houver, baixa do GitHub.
+
+    Retorna (df, origem), com origem 'snapshot' ou 'github'.
+    """
+    chave = chave_snapshot(config.repo, config.file_path, sha) if sha else None
+    if chave:
+        with medir('rotas.snapshot') as etapa:
+            df = ler_snapshot(chave)
+            etapa['linhas'] = len(df) if df is not None else 0
+        if df is not None:
+            registrar_ultimo(config.repo, config.file_path, sha)
+            return df, 'snapshot'
+
+    df = baixar_rotas(config)
+    # Só grava snapshot quando o SHA é conhecido (evita associar conteúdo a versão errada)
+    if chave and salvar_snapshot(chave, df):
+        registrar_ultimo(config.repo, config.file_path, sha)
+    return df, 'github'
+
+
+def _nova_versao(df, sha, carregado_em, verificado_em, origem) -> VersaoRotas:
+    memoria_antes = memoria_bytes(df)
+    with medir('rotas.normalizar', linhas=len(df)):
+        df = normalizar_rotas(df)
+    with medir('rotas.indice', linhas=len(df)):
+        indice = IndiceRotas(df)
+    return VersaoRotas(
+        df, sha, carregado_em, verificado_em, origem, None,
+        indice, (memoria_antes, memoria_bytes(df))
+    )
+
+
+class RotasStore:
+    """Rotas compartilhadas pelo processo, atualizadas por uma thread em segundo plano.
+
+    As leituras (`obter`) nunca fazem I/O de rede: devolvem a versão atual
+    enquanto a thread consulta o SHA do arquivo e, quando ele muda, carrega a
+    nova versão e a substitui de forma atômica.
+    """
+
+    def __init__(self, config: GithubConfig, intervalo: int = INTERVALO_ATUALIZACAO):
+        self.config = config
+        self.intervalo = intervalo
+        self._atual = VersaoRotas(None, None, None, None, 'vazio', None)
+        self._pronto = threading.Event()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+
+        # Processo novo: serve imediatamente o último snapshot em disco, se houver
+        ultimo = ler_ultimo(config.repo, config.file_path)
+        if ultimo is not None:
+            sha, df = ultimo
+            self._atual = _nova_versao(df, sha, datetime.now(), None, 'snapshot')
+            self._pronto.set()
+
+        self._thread = threading.Thread(target=self._executar, name='rotas-store', daemon=True)
+        self._thread.start()
+
+    def obter(self, timeout: float | None = None) -> VersaoRotas:
+        """Versão atual das rotas. Só espera (até `timeout`) se nada foi carregado ainda."""
+        if not self._pronto.is_set():
+            self._pronto.wait(timeout)
+        return self._atual
+
+    def solicitar_atualizacao(self):
+        """Antecipa a próxima verificação (ex.: logo após enviar um novo arquivo)."""
+        self._acordar.set()
+
+    def parar(self):
+        self._parar.set()
+        self._acordar.set()
+
+    def atualizar(self):
+        """Executa uma verificação/carga na thread atual."""
+        atual = self._atual
+        agora = datetime.now()
+        try:
+            sha = buscar_sha_commit(self.config)
+            if atual.df is not None and sha is not None and sha == atual.sha:
+                self._atual = atual._replace(verificado_em=agora, erro=None)
+                return
+            df, origem = carregar_rotas(self.config, sha)
+            # Normalização e índice são feitos aqui, fora das sessões, e trocados junto com os dados
+            self._atual = _nova_versao(df, sha, agora, agora, origem)
+        except Exception as e:
+            # Mantém servindo a versão anterior e registra o erro
+            self._atual = atual._replace(verificado_em=agora, erro=str(e))
+        finally:
+            self._pronto.set()
+
+    def _executar(self):
+        while not self._parar.is_set():
+            self.atualizar()
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+
+
+# Stores das credenciais informadas nas sessões (cada um tem uma thread e uma cópia das rotas):
+# os usados mais recentemente são mantidos (cada rerun renova o uso), os mais antigos são parados.
+# O limite cobre algumas sessões com credenciais diferentes ao mesmo tempo sem que uma pare o store da outra
+LIMITE_STORES_SESSAO = 4
+
+_stores = {}
+_stores_sessao = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def _registrado(config: GithubConfig) -> RotasStore | None:
+    store = _stores.get(config)
+    if store is None:
+        store = _stores_sessao.get(config)
+        if store is not None:
+            _stores_sessao.move_to_end(config)
+    return store
+
+
+def obter_store(config: GithubConfig, sessao: bool = False) -> RotasStore:
+    """Retorna o RotasStore do processo para a configuração, criando-o se necessário.
+
+    A configuração do ambiente (`sessao=False`) fica carregada enquanto o
+    processo existir. As informadas numa sessão (`sessao=True`) ficam num
+    registro LRU limitado a LIMITE_STORES_SESSAO; o store usado há mais tempo
+    é parado ao ser substituído, de modo que trocar as credenciais não
+    acumula threads. O store é criado fora do lock (a criação lê o snapshot
+    do disco), para não travar as consultas das outras sessões.
+    """
+    with _stores_lock:
+        store = _registrado(config)
+    if store is not None:
+        return store
+
+    novo = RotasStore(config)
+    substituidos = []
+    with _stores_lock:
+        # Outra sessão pode ter criado o mesmo store enquanto este era construído
+        store = _registrado(config)
+        if store is None:
+            store = novo
+            if sessao:
+                _stores_sessao[config] = store
+                while len(_stores_sessao) > LIMITE_STORES_SESSAO:
+                    substituidos.append(_stores_sessao.popitem(last=False)[1])
+            else:
+                _stores[config] = store
+    if store is not novo:
+        substituidos.append(novo)
+    for substituido in substituidos:
+        substituido.parar()
+    return store
@@ -0,0 +1,419 @@
+"""Motor de sequenciamento de produção (sem dependência de Streamlit).
+
+Cruza as rotas de processo com a planilha de cobertura, remove os itens
+EXCEDENTE e numera a sequência de cada Centro de Trabalho por prioridade de
+cobertura e consumo de pico.
+"""
+import numpy as np
+import pandas as pd
+
+# Ordem de prioridade para Nível de Cobertura
+NIVEL_ORDEM = {'CRÍTICO': 0, 'BAIXO': 1, 'MODERADO': 2}
+# Níveis reconhecidos (EXCEDENTE é válido, mas fica fora da sequência)
+NIVEIS_VALIDOS = (*NIVEL_ORDEM, 'EXCEDENTE')
+
+# Tratamento de Material repetido na cobertura (o merge com as rotas é sempre muitos-para-um):
+# 'maior_consumo' mantém a linha de maior Consumo(Pico); 'somar' soma o consumo na primeira linha,
+# com o nível mais crítico; 'rejeitar' descarta todas as linhas do Material
+POLITICAS_DUPLICADOS = ('maior_consumo', 'somar', 'rejeitar')
+POLITICA_PADRAO = 'maior_consumo'
+
+COLUNAS_OBRIGATORIAS = ['Material', 'Nível de Cobertura', 'Consumo(Pico)']
+COLUNAS_EXIBIR = ['Sequencia', 'Semiacabado', 'Nível de Cobertura', 'Consumo(Pico)']
+
+# Colunas das rotas sempre convertidas para category (chaves de filtro e de merge)
+COLUNAS_CATEGORICAS_ROTAS = ['Operação', 'Centro de Trabalho', 'Semiacabado']
+# Demais colunas de texto viram category se a razão valores distintos / linhas for menor que isto
+LIMITE_CARDINALIDADE = 0.5
+# Acima desta fração de linhas da operação em centros afetados, `ressequenciar` refaz tudo
+LIMITE_INCREMENTAL = 0.5
+
+
+def memoria_bytes(df: pd.DataFrame) -> int:
+    """Memória ocupada pelo DataFrame, incluindo o conteúdo das strings."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _coluna_texto(serie: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(serie.dtype) or isinstance(serie.dtype, pd.StringDtype)
+
+
+def normalizar_rotas(rotas_df: pd.DataFrame) -> pd.DataFrame:
+    """Converte as colunas de texto das rotas para category (códigos inteiros).
+
+    Operação, Centro de Trabalho e Semiacabado sempre são convertidas; as
+    demais colunas de texto apenas quando têm poucos valores distintos.
+    """
+    df = rotas_df.copy(deep=False)
+    for col in df.columns:
+        serie = df[col]
+        if not _coluna_texto(serie):
+            continue
+        if col in COLUNAS_CATEGORICAS_ROTAS or serie.nunique() < LIMITE_CARDINALIDADE * len(serie):
+            df[col] = serie.astype('category')
+    return df
+
+
+def alinhar_cobertura(cobertura_df: pd.DataFrame, rotas_df: pd.DataFrame) -> pd.DataFrame:
+    """Converte 'Material' para as mesmas categorias de 'Semiacabado' das rotas.
+
+    Com categorias idênticas, o merge é feito pelos códigos inteiros. Materiais
+    que não existem nas rotas (ou vazios) nunca teriam correspondência e são
+    descartados aqui. Se as rotas não estiverem normalizadas, nada é alterado.
+    """
+    dtype = rotas_df['Semiacabado'].dtype
+    if not isinstance(dtype, pd.CategoricalDtype) or cobertura_df['Material'].dtype == dtype:
+        return cobertura_df
+    material = pd.Categorical(cobertura_df['Material'], dtype=dtype)
+    manter = material.codes >= 0
+    return cobertura_df[manter].assign(Material=material[manter])
+
+
+def _ordem_nivel(nivel: pd.Series) -> np.ndarray:
+    """Prioridade numérica de cada Nível de Cobertura (desconhecidos = inf)."""
+    if isinstance(nivel.dtype, pd.CategoricalDtype):
+        # Mapeia só as categorias e indexa pelos códigos, sem percorrer as strings
+        por_categoria = pd.Series(nivel.cat.categories).map(NIVEL_ORDEM).to_numpy(dtype='float64', na_value=np.nan)
+        por_categoria = np.append(por_categoria, np.nan)
+        ordem = por_categoria[nivel.cat.codes.to_numpy()]
+    else:
+        ordem = nivel.map(NIVEL_ORDEM).to_numpy(dtype='float64', na_value=np.nan)
+    return np.where(np.isnan(ordem), np.inf, ordem)
+
+
+def _duplicados(material: pd.Series) -> np.ndarray:
+    """Máscara das linhas cujo Material (não vazio) aparece mais de uma vez."""
+    if isinstance(material.dtype, pd.CategoricalDtype):
+        codigos = material.cat.codes.to_numpy()
+        validos = codigos >= 0
+        contagem = np.bincount(codigos[validos], minlength=len(material.cat.categories))
+        return validos & (contagem[np.where(validos, codigos, 0)] > 1)
+    return (material.duplicated(keep=False) & material.notna()).to_numpy()
+
+
+def consolidar_cobertura(cobertura_df: pd.DataFrame, politica: str = POLITICA_PADRAO):
+    """Deixa no máximo uma linha por Material, conforme `politica` (ver POLITICAS_DUPLICADOS).
+
+    As linhas mantidas conservam a ordem da planilha. Retorna
+    (cobertura_consolidada, descartadas), em que `descartadas` são as linhas
+    originais removidas (com 'somar', as que foram somadas na primeira).
+    """
+    if politica not in POLITICAS_DUPLICADOS:
+        raise ValueError(f"Política inválida: {politica!r} (use {', '.join(POLITICAS_DUPLICADOS)})")
+    duplicado = _duplicados(cobertura_df['Material'])
+    if not duplicado.any():
+        return cobertura_df, cobertura_df.iloc[0:0]
+
+    if politica == 'rejeitar':
+        return cobertura_df[~duplicado], cobertura_df[duplicado]
+
+    consumo = cobertura_df['Consumo(Pico)'].to_numpy(dtype='float64', na_value=np.nan)
+    posicoes = np.flatnonzero(duplicado)
+    codigos, _ = pd.factorize(cobertura_df['Material'].iloc[posicoes])
+
+    if politica == 'maior_consumo':
+        # Maior consumo primeiro (vazio por último); empate fica com a linha que vem antes na planilha
+        chave = np.where(np.isnan(consumo[posicoes]), np.inf, -consumo[posicoes])
+        ordem = np.lexsort((chave, codigos))
+        primeiro = np.r_[True, codigos[ordem][1:] != codigos[ordem][:-1]]
+        descartar = np.zeros(len(cobertura_df), dtype=bool)
+        descartar[posicoes[ordem[~primeiro]]] = True
+        return cobertura_df[~descartar], cobertura_df[descartar]
+
+    # 'somar': a primeira linha de cada Material recebe a soma do consumo e o nível mais crítico
+    soma = pd.Series(consumo[posicoes]).groupby(codigos).sum(min_count=1).to_numpy()
+    nivel = _ordem_nivel(cobertura_df['Nível de Cobertura'].iloc[posicoes])
+    ordem_nivel = np.lexsort((nivel, codigos))
+    mais_critico = posicoes[ordem_nivel[np.r_[True, codigos[ordem_nivel][1:] != codigos[ordem_nivel][:-1]]]]
+    primeira = posicoes[np.unique(codigos, return_index=True)[1]]
+    descartar = np.zeros(len(cobertura_df), dtype=bool)
+    descartar[posicoes] = True
+    descartar[primeira] = False
+
+    consolidada = cobertura_df.copy()
+    col_consumo = consolidada.columns.get_loc('Consumo(Pico)')
+    col_nivel = consolidada.columns.get_loc('Nível de Cobertura')
+    consolidada.iloc[primeira, col_consumo] = soma
+    consolidada.iloc[primeira, col_nivel] = cobertura_df['Nível de Cobertura'].iloc[mais_critico].to_numpy()
+    return consolidada[~descartar], cobertura_df[descartar]
+
+
+class IndiceRotas:
+    """Índice das rotas construído uma vez por versão do arquivo.
+
+    Guarda a lista ordenada de operações e as posições das linhas de cada
+    Operação e de cada Semiacabado, para que a seleção de uma operação custe
+    apenas as linhas dela em vez de uma varredura da tabela inteira.
+    """
+
+    def __init__(self, rotas_df: pd.DataFrame):
+        self.rotas_df = rotas_df
+        self._posicoes_operacao = rotas_df.groupby('Operação', sort=True, observed=True).indices
+        self._posicoes_semiacabado = rotas_df.groupby('Semiacabado', sort=False, observed=True).indices
+        self.operacoes = list(self._posicoes_operacao)
+
+    def por_operacao(self, operacao) -> pd.DataFrame:
+        posicoes = self._posicoes_operacao.get(operacao)
+        if posicoes is None:
+            return self.rotas_df.iloc[0:0]
+        return self.rotas_df.iloc[posicoes]
+
+    def por_semiacabado(self, semiacabado) -> pd.DataFrame:
+        posicoes = self._posicoes_semiacabado.get(semiacabado)
+        if posicoes is None:
+            return self.rotas_df.iloc[0:0]
+        return self.rotas_df.iloc[posicoes]
+
+
+def sequenciar(rotas_df: pd.DataFrame, cobertura_df: pd.DataFrame, operacao,
+               indice: IndiceRotas | None = None) -> pd.DataFrame:
+    """Gera a sequência de todos os centros de trabalho de uma operação.
+
+    Retorna um único DataFrame ordenado por centro (na ordem em que aparecem
+    no merge), Nível de Cobertura e Consumo(Pico) decrescente, com a coluna
+    'Sequencia' reiniciando em 1 a cada Centro de Trabalho. Se `indice` for
+    informado, as rotas da operação são obtidas dele sem varrer `rotas_df`.
+    """
+    return _sequenciar_rotas(_rotas_da_operacao(rotas_df, operacao, indice), cobertura_df)
+
+
+def _rotas_da_operacao(rotas_df, operacao, indice):
+    if indice is not None:
+        return indice.por_operacao(operacao)
+    return rotas_df[rotas_df['Operação'] == operacao]
+
+
+def _codigos_presentes(referencia: pd.Series, serie: pd.Series) -> np.ndarray:
+    """Máscara de `serie` com os valores que aparecem em `referencia` (mesmas categorias)."""
+    presentes = np.zeros(len(serie.cat.categories) + 1, dtype=bool)
+    presentes[referencia.cat.codes.to_numpy()] = True
+    presentes[-1] = False  # código -1 (vazio)
+    return presentes[serie.cat.codes.to_numpy()]
+
+
+def _sequenciar_rotas(rotas_filtradas: pd.DataFrame, cobertura_df: pd.DataFrame) -> pd.DataFrame:
+    cobertura_df = alinhar_cobertura(cobertura_df, rotas_filtradas)
+    if isinstance(cobertura_df['Material'].dtype, pd.CategoricalDtype):
+        # Com códigos comuns, o merge só recebe a cobertura dos semiacabados destas rotas
+        cobertura_df = cobertura_df[_codigos_presentes(rotas_filtradas['Semiacabado'], cobertura_df['Material'])]
+    # Material repetido multiplicaria as linhas do merge: sem consolidação prévia, vale a política padrão
+    cobertura_df, _ = consolidar_cobertura(cobertura_df)
+    resultado = pd.merge(
+        rotas_filtradas,
+        cobertura_df,
+        left_on='Semiacabado',
+        right_on='Material',
+        how='inner',
+        validate='many_to_one'
+    )
+
+    # Códigos dos centros na ordem de primeira aparição (antes do filtro de EXCEDENTE)
+    codigos_centro, _ = pd.factorize(resultado['Centro de Trabalho'])
+    resultado['Nível_Ordem'] = _ordem_nivel(resultado['Nível de Cobertura'])
+
+    manter = (resultado['Nível de Cobertura'] != 'EXCEDENTE').to_numpy() & (codigos_centro >= 0)
+    resultado = resultado[manter]
+    codigos_centro = codigos_centro[manter]
+
+    # Ordenação global única: centro, nível (desconhecidos por último) e consumo desc
+    nivel = resultado['Nível_Ordem'].to_numpy()
+    consumo = resultado['Consumo(Pico)'].to_numpy(dtype='float64', na_value=np.nan)
+    consumo = np.where(np.isnan(consumo), np.inf, -consumo)
+    ordem = np.lexsort((consumo, nivel, codigos_centro))
+
+    resultado = resultado.iloc[ordem].reset_index(drop=True)
+    resultado['Sequencia'] = resultado.groupby('Centro de Trabalho', sort=False, observed=True).cumcount() + 1
+    return resultado
+
+
+def materiais_alterados(cobertura_anterior: pd.DataFrame, cobertura_nova: pd.DataFrame) -> pd.Index:
+    """Materiais incluídos, removidos ou com alguma linha diferente entre duas coberturas.
+
+    Cada Material é resumido pela quantidade de linhas e pela soma dos hashes
+    delas (independe da ordem), então a comparação é feita sem ordenar nem
+    cruzar as duas planilhas inteiras. Coberturas já alinhadas às rotas
+    (`alinhar_cobertura`) são comparadas direto pelos códigos das categorias.
+    """
+    colunas = [c for c in cobertura_nova.columns if c != 'Material' and c in cobertura_anterior.columns]
+    dtype = cobertura_nova['Material'].dtype
+    if isinstance(dtype, pd.CategoricalDtype) and cobertura_anterior['Material'].dtype == dtype:
+        materiais = dtype.categories
+        codigos = np.concatenate([cobertura_anterior['Material'].cat.codes, cobertura_nova['Material'].cat.codes])
+    else:
+        # Códigos comuns às duas planilhas (uma única passada de hash nas strings)
+        codigos, materiais = pd.factorize(pd.concat(
+            [cobertura_anterior['Material'].astype(object), cobertura_nova['Material'].astype(object)],
+            ignore_index=True
+        ))
+    resumos = []
+    for df, cod in ((cobertura_anterior, codigos[:len(cobertura_anterior)]),
+                    (cobertura_nova, codigos[len(cobertura_anterior):])):
+        hashes = pd.util.hash_pandas_object(df[colunas], index=False).to_numpy()
+        validos = cod >= 0
+        soma = np.zeros(len(materiais), dtype=np.uint64)
+        np.add.at(soma, cod[validos], hashes[validos])
+        resumos.append((np.bincount(cod[validos], minlength=len(materiais)), soma))
+
+    (contagem_anterior, soma_anterior), (contagem_nova, soma_nova) = resumos
+    return pd.Index(materiais[(contagem_anterior != contagem_nova) | (soma_anterior != soma_nova)])
+
+
+def centros_afetados(rotas_df: pd.DataFrame, cobertura_anterior: pd.DataFrame, cobertura_nova: pd.DataFrame,
+                     operacao, indice: IndiceRotas | None = None) -> list:
+    """Centros da operação com algum Material incluído, removido ou alterado entre as coberturas.
+
+    São os mesmos centros que `ressequenciar` reordena, calculados só a partir
+    das duas coberturas (sem depender de uma sequência anterior).
+    """
+    rotas_operacao = _rotas_da_operacao(rotas_df, operacao, indice)
+    alterados = materiais_alterados(
+        alinhar_cobertura(cobertura_anterior, rotas_operacao), alinhar_cobertura(cobertura_nova, rotas_operacao)
+    )
+    centros = rotas_operacao['Centro de Trabalho'][rotas_operacao['Semiacabado'].isin(alterados).to_numpy()]
+    return list(pd.unique(centros.dropna().to_numpy()))
+
+
+def ressequenciar(anterior: pd.DataFrame, rotas_df: pd.DataFrame, cobertura_anterior: pd.DataFrame,
+                  cobertura_nova: pd.DataFrame, operacao, indice: IndiceRotas | None = None,
+                  alterados: pd.Index | None = None):
+    """Atualiza o resultado de `sequenciar` para uma nova cobertura da mesma operação.
+
+    Só os centros com algum Material incluído, removido ou alterado são
+    cruzados e ordenados de novo; os demais são reaproveitados de `anterior`
+    (se os afetados concentram a maior parte das linhas, a operação é refeita
+    inteira). O resultado é igual ao de `sequenciar(rotas_df, cobertura_nova, ...)`.
+    Passar as coberturas já alinhadas às rotas evita refazer o alinhamento, e
+    `alterados` (de `materiais_alterados`) evita refazer a comparação por operação.
+    Retorna (resultado, centros_afetados).
+    """
+    rotas_operacao = _rotas_da_operacao(rotas_df, operacao, indice)
+    cobertura_anterior = alinhar_cobertura(cobertura_anterior, rotas_operacao)
+    cobertura_nova = alinhar_cobertura(cobertura_nova, rotas_operacao)
+    semiacabados = rotas_operacao['Semiacabado']
+    # Centros tratados pelos códigos das categorias (sem materializar as strings)
+    centros = rotas_operacao['Centro de Trabalho']
+    if not isinstance(centros.dtype, pd.CategoricalDtype):
+        centros = centros.astype('category')
+    dtype_centro = centros.dtype
+    codigos_centro = centros.cat.codes.to_numpy()
+
+    if alterados is None:
+        alterados = materiais_alterados(cobertura_anterior, cobertura_nova)
+    afetados = pd.unique(codigos_centro[semiacabados.isin(alterados).to_numpy()])
+    afetados = afetados[afetados >= 0]
+    if not len(afetados):
+        return anterior, []
+
+    # Última posição: código -1 (centro vazio)
+    eh_afetado = np.zeros(len(dtype_centro.categories) + 1, dtype=bool)
+    eh_afetado[afetados] = True
+    em_afetados = eh_afetado[codigos_centro]
+    afetados_lista = list(dtype_centro.categories[afetados])
+    if em_afetados.sum() > LIMITE_INCREMENTAL * len(em_afetados):
+        return _sequenciar_rotas(rotas_operacao, cobertura_nova), afetados_lista
+
+    recalculado = _sequenciar_rotas(rotas_operacao[em_afetados], cobertura_nova)
+    # Os materiais mantidos existem na cobertura nova, então as categorias novas os contêm
+    for col in cobertura_nova.columns:
+        if col in anterior.columns and isinstance(cobertura_nova[col].dtype, pd.CategoricalDtype):
+            anterior = anterior.astype({col: cobertura_nova[col].dtype})
+
+    # Blocos contíguos de cada centro: afetados vêm do recálculo, os demais do resultado anterior
+    blocos = {}
+    for df, usar in ((anterior, ~eh_afetado), (recalculado, eh_afetado)):
+        codigos = _codigos(df['Centro de Trabalho'], dtype_centro)
+        inicio = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]]) if len(codigos) else np.array([], dtype=int)
+        fim = np.r_[inicio[1:], len(codigos)]
+        for a, b in zip(inicio, fim):
+            if usar[codigos[a]]:
+                blocos[codigos[a]] = df.iloc[a:b]
+
+    # Ordem dos centros igual à do merge completo: primeira aparição entre as rotas com cobertura
+    if isinstance(cobertura_nova['Material'].dtype, pd.CategoricalDtype):
+        com_cobertura = _codigos_presentes(cobertura_nova['Material'], semiacabados)
+    else:
+        com_cobertura = semiacabados.isin(cobertura_nova['Material']).to_numpy()
+    ordem_centros = pd.unique(codigos_centro[com_cobertura])
+    partes = [blocos[c] for c in ordem_centros if c in blocos]
+    resultado = pd.concat(partes, ignore_index=True) if partes else recalculado
+    return resultado, afetados_lista
+
+
+def _codigos(serie: pd.Series, dtype: pd.CategoricalDtype) -> np.ndarray:
+    if serie.dtype == dtype:
+        return serie.cat.codes.to_numpy()
+    return pd.Categorical(serie, dtype=dtype).codes
+
+
+def comparar_sequencias(anterior: pd.DataFrame, atual: pd.DataFrame, centros=None) -> pd.DataFrame:
+    """Itens que mudaram de posição entre duas sequências da mesma operação.
+
+    Retorna Centro de Trabalho, Semiacabado, 'Sequencia Anterior', 'Sequencia',
+    'Variação' (positiva quando o item subiu) e 'Situação' (Novo, Removido,
+    Subiu, Desceu). Com `centros`, apenas esses centros são comparados.
+    """
+    chaves = ['Centro de Trabalho', 'Semiacabado']
+
+    def _posicoes(df):
+        if centros is not None:
+            df = df[df['Centro de Trabalho'].isin(centros).to_numpy()]
+        df = df[chaves + ['Sequencia']].astype({col: object for col in chaves})
+        # Um Semiacabado pode aparecer mais de uma vez no mesmo centro
+        return df.assign(_ocorrencia=df.groupby(chaves, sort=False).cumcount())
+
+    comparacao = pd.merge(
+        _posicoes(anterior), _posicoes(atual),
+        on=chaves + ['_ocorrencia'], how='outer', suffixes=(' Anterior', '')
+    )
+    comparacao = comparacao.astype({'Sequencia Anterior': 'Int64', 'Sequencia': 'Int64'})
+    comparacao['Variação'] = comparacao['Sequencia Anterior'] - comparacao['Sequencia']
+    comparacao['Situação'] = np.select(
+        [comparacao['Sequencia Anterior'].isna(), comparacao['Sequencia'].isna(),
+         (comparacao['Variação'] > 0).fillna(False), (comparacao['Variação'] < 0).fillna(False)],
+        ['Novo', 'Removido', 'Subiu', 'Desceu'],
+        default=''
+    )
+    comparacao = comparacao[comparacao['Situação'] != '']
+    # Centros na ordem do resultado atual (removidos por completo ao final)
+    ordem_centros = pd.unique(np.concatenate([
+        atual['Centro de Trabalho'].to_numpy(dtype=object), anterior['Centro de Trabalho'].to_numpy(dtype=object)
+    ]))
+    comparacao = comparacao.assign(
+        _centro=pd.Categorical(comparacao['Centro de Trabalho'], categories=ordem_centros).codes
+    ).sort_values(['_centro', 'Sequencia', 'Sequencia Anterior'], kind='stable')
+    return comparacao.drop(columns=['_ocorrencia', '_centro']).reset_index(drop=True)
+
+
+def dividir_por_centro(resultado: pd.DataFrame, colunas=COLUNAS_EXIBIR) -> dict:
+    """Separa o resultado de `sequenciar` em fatias por Centro de Trabalho.
+
+    Como o resultado já está agrupado por centro, cada fatia é um intervalo
+    contíguo de linhas obtido com `iloc`, sem máscara nem cópia por centro.
+    """
+    if resultado.empty:
+        return {}
+
+    projetado = resultado[colunas]
+    centros = resultado['Centro de Trabalho'].to_numpy()
+    # Posições onde começa cada bloco de centro
+    inicio = np.flatnonzero(np.r_[True, centros[1:] != centros[:-1]])
+    fim = np.r_[inicio[1:], len(centros)]
+    return {centros[a]: projetado.iloc[a:b] for a, b in zip(inicio, fim)}
+
+
+def resumo_por_centro(resultado: pd.DataFrame) -> pd.DataFrame:
+    """Quantidade de itens por Centro de Trabalho e Nível de Cobertura (mais o total)."""
+    if resultado.empty:
+        return pd.DataFrame(columns=['Centro de Trabalho', 'Total'])
+    # Centros na mesma ordem do resultado (ordem de primeira aparição)
+    centros = resultado['Centro de Trabalho'].to_numpy()
+    centros = pd.Categorical(centros, categories=pd.unique(centros))
+    niveis = resultado['Nível de Cobertura'].astype(object).fillna('(vazio)').to_numpy()
+    resumo = pd.crosstab(centros, niveis)
+    # Colunas na ordem de prioridade; níveis desconhecidos ao final
+    colunas = [n for n in NIVEL_ORDEM if n in resumo.columns] + [n for n in resumo.columns if n not in NIVEL_ORDEM]
+    resumo = resumo[colunas]
+    resumo['Total'] = resumo.sum(axis=1)
+    resumo.index.name = 'Centro de Trabalho'
+    resumo.columns.name = None
+    return resumo.reset_index()
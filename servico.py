@@ -0,0 +1,379 @@
+"""Serviço HTTP de sequenciamento, sem interface, para integração com MES/ERP.
+
+Usa as mesmas rotas do app (RotasStore: carregadas uma vez, mantidas em
+memória e atualizadas em segundo plano) e o mesmo sequenciamento. As
+requisições são atendidas por um pool de threads de tamanho fixo e as
+respostas ficam num cache LRU por versão das rotas, conteúdo da cobertura e
+parâmetros, de modo que repetir a mesma consulta não refaz o cálculo.
+
+    python servico.py --porta 8502 --workers 16
+
+Rotas:
+    POST /sequencia?operacao=<op>|todas&formato=json|csv|xlsx&duplicados=<política>
+         corpo: cobertura em xlsx, CSV ou JSON (Content-Type ou ?tipo=xlsx|csv|json)
+    GET  /operacoes
+    GET  /saude
+    GET  /metricas
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+import diagnostico
+from cache_resultados import CacheLRU, hash_conteudo
+from cobertura import ErroCobertura, ler_cobertura, ler_cobertura_csv, ler_cobertura_json, validar_cobertura
+from exportacao import MIME_XLSX, gerar_excel
+from sequenciamento import (
+    COLUNAS_EXIBIR, POLITICA_PADRAO, POLITICAS_DUPLICADOS, alinhar_cobertura, dividir_por_centro, sequenciar
+)
+
+logger = logging.getLogger('sequenciamento.servico')
+
+TODAS = 'todas'
+FORMATOS = {'json': 'application/json; charset=utf-8', 'csv': 'text/csv; charset=utf-8', 'xlsx': MIME_XLSX}
+TIPOS_COBERTURA = ('xlsx', 'csv', 'json')
+
+# Tamanho máximo do corpo (cobertura enviada)
+LIMITE_CORPO_BYTES = int(os.getenv('SERVICO_LIMITE_MB', '50') or 50) * 1024 * 1024
+# Conexão keep-alive ociosa por mais que isto (s) é fechada e libera a thread do pool
+TEMPO_OCIOSO_S = 5
+# Cada conexão keep-alive ocupa uma thread enquanto estiver aberta; o cálculo em si
+# é limitado pelo GIL, então o pool é dimensionado pelas conexões simultâneas e não pelos núcleos
+WORKERS_PADRAO = int(os.getenv('SERVICO_WORKERS', '32') or 32)
+# Limite de cada cache do serviço (respostas prontas e coberturas preparadas), em bytes aproximados
+LIMITE_CACHE_BYTES = int(os.getenv('SERVICO_CACHE_MB', '256') or 256) * 1024 * 1024
+# Espera pela primeira carga das rotas ao iniciar (s)
+ESPERA_ROTAS_S = 120
+
+COLUNAS_CSV = ['Operação', 'Centro de Trabalho', *COLUNAS_EXIBIR]
+
+
+class ErroRequisicao(Exception):
+    """Erro a devolver ao cliente com o status HTTP indicado."""
+
+    def __init__(self, status: int, mensagem: str, **detalhes):
+        super().__init__(mensagem)
+        self.status = status
+        self.detalhes = detalhes
+
+
+def tipo_cobertura(dados: bytes, content_type: str = '') -> str:
+    """Formato da cobertura pelo Content-Type ou, sem ele, pelo conteúdo."""
+    content_type = content_type.lower()
+    if 'spreadsheetml' in content_type or 'excel' in content_type:
+        return 'xlsx'
+    if 'csv' in content_type:
+        return 'csv'
+    if 'json' in content_type:
+        return 'json'
+    if dados[:2] == b'PK':
+        return 'xlsx'
+    if dados.lstrip()[:1] in (b'[', b'{'):
+        return 'json'
+    return 'csv'
+
+
+def ler_cobertura_bytes(dados: bytes, tipo: str) -> pd.DataFrame:
+    if tipo == 'xlsx':
+        try:
+            return ler_cobertura(io.BytesIO(dados))
+        except ErroCobertura:
+            raise
+        except Exception as e:
+            raise ErroCobertura(f'Planilha da cobertura inválida: {e}') from e
+    if tipo == 'csv':
+        return ler_cobertura_csv(dados)
+    return ler_cobertura_json(dados)
+
+
+class Sequenciador:
+    """Sequenciamento sob demanda sobre as rotas de um RotasStore.
+
+    `store` só precisa de `obter()` (ver rotas_github.RotasStore), o que
+    permite usar as rotas do GitHub, de um stub local ou já carregadas.
+    """
+
+    def __init__(self, store, max_respostas: int = 256, max_coberturas: int = 32,
+                 max_bytes: int = LIMITE_CACHE_BYTES):
+        self.store = store
+        self.respostas = CacheLRU(max_respostas, max_bytes)
+        self.coberturas = CacheLRU(max_coberturas, max_bytes)
+
+    def versao(self):
+        versao = self.store.obter(timeout=0)
+        if versao.df is None:
+            raise ErroRequisicao(503, 'Rotas ainda não carregadas', erro=versao.erro)
+        return versao
+
+    def operacoes(self) -> list:
+        return list(self.versao().indice.operacoes)
+
+    def sequencia(self, dados: bytes, tipo: str, operacoes: list, formato: str,
+                  politica: str = POLITICA_PADRAO) -> tuple[bytes, str, int]:
+        """Retorna (corpo, content-type, linhas no relatório de validação)."""
+        if formato not in FORMATOS:
+            raise ErroRequisicao(400, f"Formato inválido: {formato!r} (use {', '.join(FORMATOS)})")
+        if tipo not in TIPOS_COBERTURA:
+            raise ErroRequisicao(400, f"Tipo de cobertura inválido: {tipo!r} (use {', '.join(TIPOS_COBERTURA)})")
+        if politica not in POLITICAS_DUPLICADOS:
+            raise ErroRequisicao(400, f"Política inválida: {politica!r} (use {', '.join(POLITICAS_DUPLICADOS)})")
+
+        versao = self.versao()
+        indice = versao.indice
+        if not operacoes or TODAS in operacoes:
+            operacoes = list(indice.operacoes)
+        else:
+            # A query string traz texto; /operacoes anuncia `_texto(op)`, então a comparação é pelo texto
+            por_texto = {_texto(op): op for op in indice.operacoes}
+            desconhecidas = [op for op in operacoes if op not in por_texto]
+            if desconhecidas:
+                raise ErroRequisicao(404, f"Operação não encontrada: {', '.join(desconhecidas)}")
+            operacoes = [por_texto[op] for op in operacoes]
+
+        versao_chave = versao.sha or versao.carregado_em.isoformat()
+        hash_cobertura = hash_conteudo(dados)
+        relatorio, cobertura = self.coberturas.obter_ou_calcular(
+            ('cobertura', versao_chave, hash_cobertura, tipo, politica),
+            lambda: self._preparar(versao.df, dados, tipo, politica)
+        )
+        corpo = self.respostas.obter_ou_calcular(
+            ('sequencia', versao_chave, hash_cobertura, tipo, politica, tuple(operacoes), formato),
+            lambda: self._gerar(versao, cobertura, relatorio, operacoes, formato)
+        )
+        return corpo, FORMATOS[formato], len(relatorio)
+
+    @staticmethod
+    def _preparar(rotas_df, dados, tipo, politica):
+        with diagnostico.medir('servico.cobertura', bytes=len(dados)) as etapa:
+            validacao = validar_cobertura(ler_cobertura_bytes(dados, tipo), politica, rotas_df)
+            cobertura = alinhar_cobertura(validacao.cobertura, rotas_df)
+            etapa['linhas'] = len(cobertura)
+        return validacao.relatorio, cobertura
+
+    @staticmethod
+    def _gerar(versao, cobertura, relatorio, operacoes, formato) -> bytes:
+        with diagnostico.medir('servico.sequenciar') as etapa:
+            resultados = [(op, sequenciar(versao.df, cobertura, op, versao.indice)) for op in operacoes]
+            etapa['linhas'] = sum(len(r) for _, r in resultados)
+
+        if formato == 'xlsx':
+            if len(operacoes) == 1:
+                # Mesmo Excel do app: uma aba por Centro de Trabalho
+                return gerar_excel(dividir_por_centro(resultados[0][1]))
+            return gerar_excel({op: r[COLUNAS_CSV[1:]] for op, r in resultados})
+
+        if formato == 'csv':
+            tabela = pd.concat(
+                [r[COLUNAS_CSV[1:]].assign(**{'Operação': op}) for op, r in resultados]
+            ) if resultados else pd.DataFrame(columns=COLUNAS_CSV)
+            # Mesmo padrão dos CSV do app: separador ';', decimal ',', UTF-8 com BOM
+            return tabela[COLUNAS_CSV].to_csv(sep=';', decimal=',', index=False).encode('utf-8-sig')
+
+        partes = []
+        for op, resultado in resultados:
+            centros = ','.join(
+                f'{{"centro":{json.dumps(_texto(centro), ensure_ascii=False)},'
+                f'"itens":{df.to_json(orient="records", force_ascii=False)}}}'
+                for centro, df in dividir_por_centro(resultado).items()
+            )
+            partes.append(f'{{"operacao":{json.dumps(_texto(op), ensure_ascii=False)},"centros":[{centros}]}}')
+        texto = (
+            f'{{"rotas":{json.dumps({"sha": versao.sha, "origem": versao.origem})},'
+            f'"operacoes":[{",".join(partes)}],'
+            f'"relatorio":{relatorio.to_json(orient="records", force_ascii=False)}}}'
+        )
+        return texto.encode('utf-8')
+
+
+def _texto(valor):
+    return None if pd.isna(valor) else str(valor)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'Sequenciamento'
+    timeout = TEMPO_OCIOSO_S
+
+    def do_GET(self):
+        self._atender(self._get)
+
+    def do_POST(self):
+        self._atender(self._post)
+
+    def _atender(self, metodo):
+        try:
+            status, corpo, tipo, cabecalhos = metodo(urlsplit(self.path))
+        except ErroRequisicao as e:
+            status, corpo, tipo, cabecalhos = e.status, _json_erro(str(e), **e.detalhes), FORMATOS['json'], {}
+        except ErroCobertura as e:
+            status, corpo, tipo, cabecalhos = 400, _json_erro(str(e), colunas_ausentes=e.colunas_ausentes), FORMATOS['json'], {}
+        except Exception as e:
+            logger.exception('Falha ao atender %s %s', self.command, self.path)
+            status, corpo, tipo, cabecalhos = 500, _json_erro(f'Erro interno: {e}'), FORMATOS['json'], {}
+        self.server.contar(status)
+
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _get(self, url):
+        sequenciador = self.server.sequenciador
+        if url.path == '/saude':
+            versao = sequenciador.store.obter(timeout=0)
+            corpo = {
+                'rotas': versao.df is not None,
+                'sha': versao.sha,
+                'origem': versao.origem,
+                'linhas': len(versao.df) if versao.df is not None else 0,
+                'carregado_em': versao.carregado_em.isoformat() if versao.carregado_em else None,
+                'verificado_em': versao.verificado_em.isoformat() if versao.verificado_em else None,
+                'erro': versao.erro,
+            }
+            status = 200 if versao.df is not None else 503
+            return status, json.dumps(corpo, ensure_ascii=False).encode('utf-8'), FORMATOS['json'], {}
+        if url.path == '/operacoes':
+            corpo = json.dumps([_texto(op) for op in sequenciador.operacoes()], ensure_ascii=False)
+            return 200, corpo.encode('utf-8'), FORMATOS['json'], {}
+        if url.path == '/metricas':
+            return 200, self.server.metricas().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8', {}
+        raise ErroRequisicao(404, f'Rota não encontrada: {url.path}')
+
+    def _post(self, url):
+        if url.path != '/sequencia':
+            self.close_connection = True
+            raise ErroRequisicao(404, f'Rota não encontrada: {url.path}')
+
+        tamanho = self.headers.get('Content-Length', '')
+        if not tamanho.isdigit():
+            self.close_connection = True
+            raise ErroRequisicao(411, 'Content-Length obrigatório')
+        tamanho = int(tamanho)
+        if tamanho > LIMITE_CORPO_BYTES:
+            # O corpo não é lido: a conexão é encerrada após a resposta
+            self.close_connection = True
+            raise ErroRequisicao(413, f'Cobertura maior que o limite de {LIMITE_CORPO_BYTES // (1024 * 1024)} MB')
+        dados = self.rfile.read(tamanho)
+        if not dados:
+            raise ErroRequisicao(400, 'Cobertura vazia')
+
+        parametros = parse_qs(url.query)
+        tipo = parametros.get('tipo', [None])[0] or tipo_cobertura(dados, self.headers.get('Content-Type', ''))
+        corpo, content_type, alertas = self.server.sequenciador.sequencia(
+            dados,
+            tipo,
+            parametros.get('operacao', []),
+            parametros.get('formato', ['json'])[0],
+            parametros.get('duplicados', [POLITICA_PADRAO])[0],
+        )
+        return 200, corpo, content_type, {'X-Cobertura-Alertas': str(alertas)}
+
+    def log_message(self, formato, *args):
+        logger.debug('%s - %s', self.address_string(), formato % args)
+
+
+def _json_erro(mensagem, **detalhes) -> bytes:
+    return json.dumps({'erro': mensagem, **detalhes}, ensure_ascii=False, default=str).encode('utf-8')
+
+
+class ServidorSequenciamento(HTTPServer):
+    """HTTPServer que atende cada conexão numa thread de um pool de tamanho fixo."""
+
+    request_queue_size = 128
+
+    def __init__(self, endereco, sequenciador: Sequenciador, workers: int | None = None):
+        super().__init__(endereco, _Handler)
+        self.sequenciador = sequenciador
+        self.workers = workers or WORKERS_PADRAO
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='servico')
+        self._lock = threading.Lock()
+        self._por_status = {}
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._processar, request, client_address)
+
+    def _processar(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def contar(self, status: int):
+        with self._lock:
+            self._por_status[status] = self._por_status.get(status, 0) + 1
+
+    def metricas(self) -> str:
+        """Etapas (diagnostico), requisições por status e uso dos caches, no formato Prometheus."""
+        with self._lock:
+            por_status = sorted(self._por_status.items())
+        linhas = ['# TYPE sequenciamento_servico_requisicoes_total counter']
+        linhas += [f'sequenciamento_servico_requisicoes_total{{status="{s}"}} {n}' for s, n in por_status]
+        for nome, cache in (('respostas', self.sequenciador.respostas), ('coberturas', self.sequenciador.coberturas)):
+            est = cache.estatisticas()
+            linhas.append(f'sequenciamento_servico_cache_acertos_total{{cache="{nome}"}} {est["acertos"]}')
+            linhas.append(f'sequenciamento_servico_cache_falhas_total{{cache="{nome}"}} {est["falhas"]}')
+            linhas.append(f'sequenciamento_servico_cache_entradas{{cache="{nome}"}} {est["entradas"]}')
+            linhas.append(f'sequenciamento_servico_cache_bytes{{cache="{nome}"}} {est["bytes"]}')
+        return diagnostico.texto_prometheus() + '\n'.join(linhas) + '\n'
+
+
+def criar_servidor(store, host: str = '127.0.0.1', porta: int = 8502,
+                   workers: int | None = None) -> ServidorSequenciamento:
+    """Servidor pronto para `serve_forever()`; `porta=0` escolhe uma porta livre."""
+    return ServidorSequenciamento((host, porta), Sequenciador(store), workers)
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+    from rotas_github import config_do_ambiente, obter_store
+
+    parser = argparse.ArgumentParser(description='Serviço HTTP de sequenciamento (sem interface).')
+    parser.add_argument('--host', default=os.getenv('SERVICO_HOST', '127.0.0.1'))
+    parser.add_argument('--porta', type=int, default=int(os.getenv('SERVICO_PORTA', '8502') or 8502))
+    parser.add_argument('--workers', type=int, default=None,
+                        help=f'Threads que atendem as conexões (padrão: {WORKERS_PADRAO})')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    load_dotenv()
+    store = obter_store(config_do_ambiente())
+    versao = store.obter(timeout=ESPERA_ROTAS_S)
+    if versao.df is None:
+        logger.warning('Rotas ainda não carregadas (%s); o serviço responde 503 até a primeira carga', versao.erro)
+    else:
+        logger.info('Rotas carregadas: %s linhas, commit %s (%s)', len(versao.df), versao.sha, versao.origem)
+
+    servidor = criar_servidor(store, args.host, args.porta, args.workers)
+    logger.info('Serviço em http://%s:%s (%s workers)', args.host, servidor.server_port, servidor.workers)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        store.parar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""Testes da validação da cobertura (cobertura.py).
+
+    python -m pytest -q
+"""
+import numpy as np
+import pandas as pd
+
+from cobertura import COLUNAS_RELATORIO, ler_cobertura_csv, validar_cobertura
+
+
+def test_relatorio_lista_cada_linha_com_motivo_e_tratamento():
+    cobertura = pd.DataFrame({
+        'Material': ['A', None, 'A', 'B', 'C', 'X'],
+        'Nível de Cobertura': pd.Categorical(['BAIXO', 'BAIXO', 'CRÍTICO', 'URGENTE', 'MODERADO', 'BAIXO']),
+        'Consumo(Pico)': [5.0, 1.0, 9.0, 2.0, np.nan, 4.0],
+    }, index=pd.RangeIndex(2, 8, name='Linha'))
+    rotas = pd.DataFrame({'Semiacabado': ['A', 'B', 'C']})
+
+    validacao = validar_cobertura(cobertura, 'maior_consumo', rotas)
+
+    assert validacao.cobertura.index.tolist() == [4, 5, 6, 7]
+    assert validacao.relatorio.columns.tolist() == COLUNAS_RELATORIO
+    assert list(zip(validacao.relatorio['Linha'], validacao.relatorio['Motivo'])) == [
+        (2, 'Material duplicado'),
+        (3, 'Material vazio'),
+        (5, 'Nível de Cobertura desconhecido'),
+        (6, 'Consumo(Pico) vazio ou inválido'),
+        (7, 'Material sem rota'),
+    ]
+    assert validacao.relatorio['Tratamento'].iloc[0] == 'Descartada (mantida a linha de maior consumo)'
+
+
+def test_tratamento_do_duplicado_segue_a_politica():
+    cobertura = ler_cobertura_csv(b'Material;N\xc3\xadvel de Cobertura;Consumo(Pico)\nA;BAIXO;5\nA;CR\xc3\x8dTICO;2,5\n')
+
+    somar = validar_cobertura(cobertura, 'somar')
+    rejeitar = validar_cobertura(cobertura, 'rejeitar')
+
+    assert somar.cobertura['Consumo(Pico)'].tolist() == [7.5]
+    assert somar.relatorio['Tratamento'].tolist() == ['Consumo somado na primeira linha do Material']
+    assert rejeitar.cobertura.empty
+    assert rejeitar.relatorio['Linha'].tolist() == [2, 3]
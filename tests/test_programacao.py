@@ -0,0 +1,142 @@
+"""Testes da programação com capacidade finita (programacao.py).
+
+    python -m pytest -q
+"""
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from programacao import CALENDARIO_PADRAO, ErroCalendario, RecursoCentro, Turno, programar
+
+# Sexta-feira; o calendário padrão trabalha das 06:00 às 22:00 de segunda a sexta
+SEXTA = date(2026, 10, 16)
+SEGUNDA = date(2026, 10, 19)
+
+
+def _em(dia, hora, minuto=0):
+    return pd.Timestamp(datetime.combine(dia, time(hora, minuto)))
+
+
+def _janelas(calendario, a, b):
+    """Intervalos de trabalho do calendário entre os dias de `a` e `b` (força bruta, dia a dia)."""
+    dia = a.date() - timedelta(days=1)
+    while dia <= b.date():
+        for turno in calendario:
+            if dia.weekday() in turno.dias:
+                ini = datetime.combine(dia, turno.inicio)
+                fim = datetime.combine(dia, turno.fim)
+                yield ini, fim if fim > ini else fim + timedelta(days=1)
+        dia += timedelta(days=1)
+
+
+def _minutos_trabalhados(calendario, a, b):
+    janelas = _janelas(calendario, a, b)
+    return sum(max((min(fim, b) - max(ini, a)).total_seconds(), 0) for ini, fim in janelas) / 60
+
+
+def test_item_que_termina_no_fim_do_turno_e_o_proximo_vai_para_segunda():
+    resultado = pd.DataFrame({
+        'Centro de Trabalho': ['CT1', 'CT1'],
+        'Sequencia': [1, 2],
+        'Semiacabado': ['A', 'B'],
+        'Tempo Ciclo (min)': [60.0, 30.0],
+    })
+
+    programa = programar(resultado, datetime.combine(SEXTA, time(21, 0)))
+
+    assert programa['Início'].tolist() == [_em(SEXTA, 21), _em(SEGUNDA, 6)]
+    assert programa['Fim'].tolist() == [_em(SEXTA, 22), _em(SEGUNDA, 6, 30)]
+
+
+def test_item_que_nao_cabe_no_turno_continua_no_proximo_dia_util():
+    resultado = pd.DataFrame({
+        'Centro de Trabalho': ['CT1', 'CT1', 'CT1'],
+        'Sequencia': [1, 2, 3],
+        'Semiacabado': ['A', 'B', 'C'],
+        'Tempo Ciclo (min)': [30.0, 90.0, 30.0],
+    })
+
+    programa = programar(resultado, datetime.combine(SEXTA, time(21, 0)))
+
+    # B: 30 min na sexta e 60 min na segunda
+    assert programa['Início'].tolist() == [_em(SEXTA, 21), _em(SEXTA, 21, 30), _em(SEGUNDA, 7)]
+    assert programa['Fim'].tolist() == [_em(SEXTA, 21, 30), _em(SEGUNDA, 7), _em(SEGUNDA, 7, 30)]
+
+
+def test_maquinas_em_paralelo_atendem_na_ordem_da_sequencia():
+    resultado = pd.DataFrame({
+        'Centro de Trabalho': ['CT1'] * 4,
+        'Sequencia': [1, 2, 3, 4],
+        'Semiacabado': ['A', 'B', 'C', 'D'],
+    })
+
+    programa = programar(
+        resultado, datetime.combine(SEGUNDA, time(6, 0)), {'CT1': RecursoCentro(CALENDARIO_PADRAO, 2)},
+        tempo_ciclo_padrao=60
+    )
+
+    assert programa['Máquina'].tolist() == [1, 2, 1, 2]
+    assert programa['Início'].tolist() == [_em(SEGUNDA, 6), _em(SEGUNDA, 6), _em(SEGUNDA, 7), _em(SEGUNDA, 7)]
+
+
+def test_itens_alem_do_horizonte_ficam_sem_horario():
+    resultado = pd.DataFrame({
+        'Centro de Trabalho': ['CT1'] * 3,
+        'Sequencia': [1, 2, 3],
+        'Semiacabado': ['A', 'B', 'C'],
+    })
+
+    programa = programar(
+        resultado, datetime.combine(SEGUNDA, time(6, 0)), tempo_ciclo_padrao=60,
+        fim_horizonte=datetime.combine(SEGUNDA, time(7, 30))
+    )
+
+    assert programa['Máquina'].isna().tolist() == [False, False, True]
+    assert programa['Início'].isna().tolist() == [False, False, True]
+
+
+def test_calendario_sem_horas_de_trabalho():
+    resultado = pd.DataFrame({'Centro de Trabalho': ['CT1'], 'Sequencia': [1], 'Semiacabado': ['A']})
+
+    with pytest.raises(ErroCalendario):
+        programar(resultado, datetime.combine(SEGUNDA, time(6, 0)), {'CT1': RecursoCentro(())})
+
+
+def test_horarios_dentro_dos_turnos_e_sem_sobreposicao():
+    rng = np.random.default_rng(17)
+    recursos = {
+        # Turno noturno que atravessa a meia-noite, com duas máquinas
+        'CT1': RecursoCentro((Turno(frozenset(range(6)), time(22, 0), time(6, 0)),), 2),
+        # Dois turnos com intervalo entre eles
+        'CT2': RecursoCentro((Turno(frozenset(range(5)), time(7, 0), time(11, 0)),
+                              Turno(frozenset(range(5)), time(12, 0), time(16, 30))), 1),
+        # CT3 usa o calendário padrão com três máquinas
+        'CT3': RecursoCentro(CALENDARIO_PADRAO, 3),
+    }
+    centros = rng.choice(['CT1', 'CT2', 'CT3'], 120)
+    resultado = pd.DataFrame({
+        'Centro de Trabalho': centros,
+        'Sequencia': pd.Series(centros).groupby(centros).cumcount().to_numpy() + 1,
+        'Semiacabado': [f'SA{i}' for i in range(120)],
+        'Tempo Ciclo (min)': rng.integers(0, 300, 120).astype('float64'),
+    })
+    inicio = datetime.combine(SEXTA, time(13, 17))
+
+    programa = programar(resultado, inicio, recursos)
+
+    assert programa['Início'].notna().all()
+    for item in programa.to_dict('records'):
+        calendario = recursos[item['Centro de Trabalho']].calendario
+        ini, fim = item['Início'].to_pydatetime(), item['Fim'].to_pydatetime()
+        assert ini >= inicio
+        assert _minutos_trabalhados(calendario, ini, fim) == item['Duração (min)']
+        # Início dentro de um turno (não no fim dele); término dentro de um turno
+        assert any(a <= ini < b for a, b in _janelas(calendario, ini, ini))
+        assert any(a <= fim <= b for a, b in _janelas(calendario, fim, fim))
+
+    for _, itens in programa.groupby(['Centro de Trabalho', 'Máquina']):
+        itens = itens.sort_values('Sequencia')
+        assert itens['Início'].is_monotonic_increasing
+        assert (itens['Início'].to_numpy()[1:] >= itens['Fim'].to_numpy()[:-1]).all()
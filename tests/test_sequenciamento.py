@@ -0,0 +1,156 @@
+"""Testes do motor de sequenciamento (sequenciamento.py).
+
+    python -m pytest -q
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from sequenciamento import (
+    IndiceRotas, alinhar_cobertura, centros_afetados, consolidar_cobertura, normalizar_rotas, ressequenciar,
+    sequenciar
+)
+
+NIVEIS = ['CRÍTICO', 'BAIXO', 'MODERADO', 'EXCEDENTE', 'DESCONHECIDO']
+
+
+def _rotas(rng):
+    # Cada Semiacabado passa por um centro em cada operação; centros de tamanhos variados
+    linhas = []
+    for operacao in ('OP10', 'OP20'):
+        for i in range(60):
+            centro = f'CT{min(rng.geometric(0.35), 6)}'
+            linhas.append((operacao, centro, f'SA{i:03d}', f'Descrição {i % 7}'))
+    return pd.DataFrame(linhas, columns=['Operação', 'Centro de Trabalho', 'Semiacabado', 'Descrição'])
+
+
+def _cobertura(rng, materiais):
+    consumo = rng.integers(1, 50, len(materiais)).astype('float64')
+    consumo[rng.random(len(materiais)) < 0.1] = np.nan
+    return pd.DataFrame({
+        'Material': materiais,
+        'Nível de Cobertura': pd.Categorical(rng.choice(NIVEIS, len(materiais), p=[.3, .3, .2, .15, .05])),
+        'Consumo(Pico)': consumo,
+    }, index=pd.RangeIndex(2, len(materiais) + 2, name='Linha'))
+
+
+def _alterar(rng, cobertura, rotas, operacao):
+    """Altera, inclui e remove materiais de um único centro da operação."""
+    rotas_op = rotas[rotas['Operação'] == operacao]
+    centro = rng.choice(rotas_op['Centro de Trabalho'].unique().tolist())
+    do_centro = rotas_op.loc[rotas_op['Centro de Trabalho'] == centro, 'Semiacabado'].astype(str).tolist()
+    nova = cobertura.copy()
+    mudar = nova['Material'].isin(rng.choice(do_centro, min(3, len(do_centro)), replace=False))
+    nova.loc[mudar, 'Consumo(Pico)'] = rng.integers(1, 50, mudar.sum()).astype('float64')
+    nova = nova[~nova['Material'].eq(do_centro[0])]
+    ausentes = sorted(set(do_centro) - set(nova['Material']))
+    if ausentes:
+        nova = pd.concat([nova, _cobertura(rng, ausentes[:2])])
+    return nova, centro
+
+
+def test_ressequenciar_igual_a_sequenciar():
+    rng = np.random.default_rng(16)
+    for rodada in range(30):
+        rotas = _rotas(rng)
+        if rodada % 2:
+            rotas = normalizar_rotas(rotas)
+        indice = IndiceRotas(rotas)
+        operacao = 'OP10' if rodada % 3 else 'OP20'
+        anterior_cob = _cobertura(rng, [f'SA{i:03d}' for i in rng.permutation(60)[:45]])
+        if rodada % 5 == 4:
+            # Cobertura inteira nova: a maior parte das linhas é afetada e a operação é refeita
+            nova_cob, centro = _cobertura(rng, [f'SA{i:03d}' for i in rng.permutation(60)[:45]]), None
+        else:
+            nova_cob, centro = _alterar(rng, anterior_cob, rotas, operacao)
+        if rodada % 4 == 1:
+            # Como no app: coberturas já alinhadas às rotas
+            anterior_cob, nova_cob = alinhar_cobertura(anterior_cob, rotas), alinhar_cobertura(nova_cob, rotas)
+
+        anterior = sequenciar(rotas, anterior_cob, operacao, indice)
+        resultado, centros = ressequenciar(anterior, rotas, anterior_cob, nova_cob, operacao, indice)
+
+        pd.testing.assert_frame_equal(resultado, sequenciar(rotas, nova_cob, operacao, indice))
+        if centro is not None:
+            assert set(centros) <= {centro}
+        assert set(centros) == set(centros_afetados(rotas, anterior_cob, nova_cob, operacao, indice))
+
+
+def test_ressequenciar_sem_alteracoes_devolve_anterior():
+    rng = np.random.default_rng(0)
+    rotas = normalizar_rotas(_rotas(rng))
+    cobertura = _cobertura(rng, [f'SA{i:03d}' for i in range(60)])
+    anterior = sequenciar(rotas, cobertura, 'OP10')
+
+    resultado, centros = ressequenciar(anterior, rotas, cobertura, cobertura.copy(), 'OP10')
+
+    assert resultado is anterior
+    assert centros == []
+
+
+def test_sequencia_reinicia_por_centro_e_ordena_por_nivel_e_consumo():
+    rotas = pd.DataFrame({
+        'Operação': ['OP10'] * 5,
+        'Centro de Trabalho': ['CT1', 'CT1', 'CT1', 'CT2', 'CT2'],
+        'Semiacabado': ['A', 'B', 'C', 'D', 'E'],
+    })
+    cobertura = pd.DataFrame({
+        'Material': ['A', 'B', 'C', 'D', 'E'],
+        'Nível de Cobertura': ['BAIXO', 'CRÍTICO', 'BAIXO', 'EXCEDENTE', 'MODERADO'],
+        'Consumo(Pico)': [1.0, 2.0, 5.0, 9.0, np.nan],
+    })
+
+    resultado = sequenciar(rotas, cobertura, 'OP10')
+
+    assert resultado['Semiacabado'].tolist() == ['B', 'C', 'A', 'E']
+    assert resultado['Sequencia'].tolist() == [1, 2, 3, 1]
+
+
+def _cobertura_duplicada():
+    # A: três linhas (empate no maior consumo); C: uma com consumo vazio; D: só consumos vazios
+    return pd.DataFrame({
+        'Material': ['A', 'B', 'A', 'A', 'C', 'C', 'D', 'D'],
+        'Nível de Cobertura': pd.Categorical(
+            ['BAIXO', 'CRÍTICO', 'CRÍTICO', 'MODERADO', 'BAIXO', 'MODERADO', 'MODERADO', 'BAIXO']
+        ),
+        'Consumo(Pico)': [5.0, 1.0, 9.0, 9.0, np.nan, 3.0, np.nan, np.nan],
+    }, index=pd.RangeIndex(2, 10, name='Linha'))
+
+
+def test_duplicados_maior_consumo_mantem_a_primeira_linha_de_maior_consumo():
+    consolidada, descartadas = consolidar_cobertura(_cobertura_duplicada(), 'maior_consumo')
+
+    assert consolidada.index.tolist() == [3, 4, 7, 8]
+    assert descartadas.index.tolist() == [2, 5, 6, 9]
+
+
+def test_duplicados_somar_acumula_na_primeira_linha_com_o_nivel_mais_critico():
+    consolidada, descartadas = consolidar_cobertura(_cobertura_duplicada(), 'somar')
+
+    assert consolidada.index.tolist() == [2, 3, 6, 8]
+    assert descartadas.index.tolist() == [4, 5, 7, 9]
+    assert consolidada['Nível de Cobertura'].tolist() == ['CRÍTICO', 'CRÍTICO', 'BAIXO', 'BAIXO']
+    assert consolidada['Consumo(Pico)'].tolist()[:3] == [23.0, 1.0, 3.0]
+    assert np.isnan(consolidada.loc[8, 'Consumo(Pico)'])
+
+
+def test_duplicados_rejeitar_descarta_todas_as_linhas_do_material():
+    consolidada, descartadas = consolidar_cobertura(_cobertura_duplicada(), 'rejeitar')
+
+    assert consolidada.index.tolist() == [3]
+    assert descartadas.index.tolist() == [2, 4, 5, 6, 7, 8, 9]
+
+
+def test_politica_de_duplicados_invalida():
+    with pytest.raises(ValueError):
+        consolidar_cobertura(_cobertura_duplicada(), 'ignorar')
+
+
+def test_material_repetido_nao_multiplica_as_rotas():
+    rotas = pd.DataFrame({'Operação': ['OP10'] * 2, 'Centro de Trabalho': ['CT1'] * 2, 'Semiacabado': ['A', 'B']})
+
+    resultado = sequenciar(rotas, _cobertura_duplicada(), 'OP10')
+
+    # Sem consolidação prévia vale a política padrão (maior consumo)
+    assert resultado['Semiacabado'].tolist() == ['A', 'B']
+    assert resultado['Consumo(Pico)'].tolist() == [9.0, 1.0]